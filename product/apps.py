@@ -10,6 +10,8 @@ class ProductConfig(AppConfig):
         Called when Django starts up.
         Import all company assistants to ensure they are registered with django-ai-assistant.
         """
+        from . import signals  # noqa: F401
+
         try:
             # Import the assistants module to trigger discovery and registration
             from product.assistants import COMPANY_ASSISTANTS
@@ -5,22 +5,274 @@ Dedicated AI assistant for Wazen company with their specific tools and configura
 Complete isolation from other companies.
 """
 
-import json
 import logging
 import re
+import time
+import uuid
 from datetime import timedelta
+from functools import lru_cache, wraps
+import orjson
 from django.utils import timezone
 from django.core.cache import cache
 from django.conf import settings
+from django.db import DatabaseError, connections, router, transaction
+from django.db.models import Case, F, Func, JSONField, Q, Value, When
 from django_ai_assistant import AIAssistant, method_tool
+from django_ai_assistant.models import Thread
 
 from saia.base_ai_assistant import SAIAAIAssistantMixin
 from saia.client_data_service import ClientDataService
 from saia.knowledge_service import KnowledgeService
+from company.models import Company
+from product.cache import (
+    COMPANY_INFO_CACHE_TIMEOUT,
+    OVERVIEW_COUNTS_CACHE_TIMEOUT,
+    RECENT_ORDERS_CACHE_TIMEOUT,
+    SERVICES_CACHE_TIMEOUT,
+    WAZEN_COMPANY_ID_CACHE_TIMEOUT,
+    company_info_cache_key,
+    invalidate_services_cache,
+    orderable_services_cache_key,
+    overview_counts_cache_key,
+    recent_orders_cache_key,
+    service_names_cache_key,
+    services_text_cache_key,
+    wazen_company_id_cache_key,
+)
 from product.models import Product, ServiceOrder, ServiceOrderCache
 
 logger = logging.getLogger(__name__)
 
+# Bound once; the tools read the clock on every chat turn
+_now = timezone.now
+
+
+def _dumps(data) -> str:
+    """Serialize a tool response to JSON text, keeping Arabic characters as-is."""
+    return orjson.dumps(data, default=str, option=orjson.OPT_NON_STR_KEYS).decode()
+
+
+def _tool_error_handler(log_message, error_message):
+    """
+    Log any unexpected exception raised by a tool and return the standard
+    Wazen error response instead.
+    """
+    def decorator(method):
+        @wraps(method)
+        def wrapper(self, *args, **kwargs):
+            try:
+                return method(self, *args, **kwargs)
+            except Exception as e:
+                logger.error("%s: %s", log_message, e)
+                return self._error_response(error_message, str(e))
+        return wrapper
+    return decorator
+
+
+# Static error responses, serialized once at import time
+_ERR_NO_COMPANY = _dumps({"status": "error", "message": "User company information not available"})
+_ERR_NO_ACTIVE_ORDER = _dumps({"status": "error", "message": "لا يوجد طلب خدمة نشط. ابدأ بطلب خدمة جديدة."})
+_ERR_AGE_RANGE = _dumps({"status": "error", "message": "العمر يجب أن يكون بين 18 و 120 سنة"})
+_ERR_AGE_NOT_NUMBER = _dumps({"status": "error", "message": "اكتب العمر بالأرقام"})
+_ERR_ID_EMPTY = _dumps({"status": "error", "message": "اكتب رقم الهوية"})
+_ERR_ID_FORMAT = _dumps({"status": "error", "message": "رقم الهوية يجب أن يكون 10 أرقام بالضبط"})
+_ERR_PHONE_NOT_DIGITS = _dumps({"status": "error", "message": "رقم الهاتف يجب أن يحتوي على أرقام فقط"})
+_ERR_PHONE_FORMAT = _dumps({"status": "error", "message": "رقم الهاتف يجب أن يكون 9 أرقام تبدأ بـ 5، أو 10 أرقام تبدأ بـ 05"})
+
+
+def _require_company(method):
+    """Answer with the no-company error unless the assistant's user has a company."""
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        user = getattr(self, '_user', None)
+        if not user or not user.company_id:
+            return _ERR_NO_COMPANY
+        return method(self, *args, **kwargs)
+    return wrapper
+
+
+# Full name: at least two whitespace-separated words (input is already stripped)
+_FULL_NAME_RE = re.compile(r'\S\s+\S')
+
+# Saudi national/iqama ID and mobile number formats (used with fullmatch)
+_ID_RE = re.compile(r'\d{10}')
+_PHONE_RE = re.compile(r'0?5\d{8}')
+# Separators customers commonly type inside phone numbers, plus the
+# LRM/RLM direction marks Arabic keyboards paste around digits
+_PHONE_STRIP = str.maketrans('', '', ' -\t\u200e\u200f')
+
+# Order numbers are "WZ-" plus the first 8 hex digits of the order UUID
+# (see ServiceOrder.format_order_number)
+_ORDER_NUMBER_RE = re.compile(r'WZ-([0-9A-F]{8})')
+
+# Any of these in a message means the customer says the image was uploaded
+_UPLOAD_RE = re.compile(
+    '|'.join(map(re.escape, ['رفع', 'صورة', 'تم', 'uploaded', 'image', 'photo'])),
+    re.IGNORECASE
+)
+
+# Arabic labels for missing customer fields
+_FIELD_NAMES_AR = {
+    'customer_age': 'العمر',
+    'customer_id': 'رقم الهوية',
+    'customer_phone': 'رقم الهاتف'
+}
+
+# Collection step for each missing customer field
+_NEXT_STEP = {
+    'customer_age': 'collect_age',
+    'customer_id': 'collect_id',
+    'customer_phone': 'collect_phone'
+}
+
+# Greetings are fixed per visitor type, so they are built once
+_GREETING_RETURNING = """وعليكم السلام ورحمة الله وبركاته! 🌟 أهلاً وسهلاً فيك مرة ثانية في وازن.
+
+بناءً على كلامنا اللي فات، أقدر أساعدك في:
+• 🔍 الإجابة على أسئلتك حول التأمين والخدمات
+• 📋 متابعة أو طلب خدمات جديدة
+• 💡 أعطيك معلومات ودعم متخصص
+
+إيش أقدر أساعدك فيه اليوم؟"""
+
+_GREETING_NEW = """وعليكم السلام ورحمة الله وبركاته! 👋
+
+أهلاً وسهلاً فيك في وازن! أنا مساعدك الذكي ومبسوط إني أخدمك.
+
+أقدر أساعدك في:
+🔍 **الاستفسارات**: إجابات دقيقة حول التأمين والخدمات
+📋 **طلب الخدمات**: إرشاد ذكي خلال عملية الطلب
+💡 **الدعم المتخصص**: مساعدة شخصية حسب احتياجاتك
+
+إيش اللي تبي تعرفه؟"""
+
+# Service name fragment to fall back to for each matched service type;
+# general insurance terms default to comprehensive
+_SERVICE_TYPE_ALIASES = {
+    'comprehensive': 'شامل',
+    'insurance': 'شامل',
+    'third_party': 'ضد الغير'
+}
+
+# Replies accepted as an order confirmation
+_CONFIRM_KEYWORDS = frozenset({'yes', 'نعم', 'confirm', 'أكد', 'موافق', 'ok', 'تأكيد', 'تاكيد'})
+
+# Upload instructions shown when image collection starts
+_IMAGE_INSTRUCTIONS = (
+    "📸 ارفع صورة شخصية واضحة",
+    "✅ تأكد إن الصورة تظهر وجهك بوضوح",
+    "📱 تقدر تستخدم الكاميرا أو تختار صورة من الجهاز",
+    "🔒 الصورة آمنة ومحمية وفقاً لسياسة الخصوصية",
+)
+
+# Collection and confirmation message templates, filled with %-formatting
+_MSG_SERVICE_SELECTED = (
+    "تم اختيار خدمة '%s' بنجاح! 🎉\n\n"
+    "الحين أحتاج أجمع معلوماتك الشخصية عشان نكمل الطلب:\n\n"
+    "📝 **المعلومات المطلوبة:**\n"
+    "• الاسم الكامل\n• العمر\n• رقم الهوية\n• رقم الجوال\n• الصورة الشخصية\n\n"
+    "ابدأ بإعطائي اسمك الكامل."
+)
+_MSG_NAME_OK = "تم جمع اسمك بنجاح: %s. باقي %d معلومات."
+_MSG_AGE_OK = "تم جمع عمرك بنجاح: %s سنة. باقي %d معلومات."
+_MSG_ID_OK = "تم جمع رقم هويتك بنجاح: %s. باقي %d معلومات."
+_MSG_PHONE_OK = "رقم الجوال '%s' تم حفظه بنجاح. باقي %d حقول."
+_MSG_PHONE_DONE = (
+    "رقم الجوال '%s' تم حفظه بنجاح. ✅ خلاص جمعنا كل المعلومات الأساسية!\n\n"
+    "📸 الحين نحتاج صورتك الشخصية عشان نكمل الطلب. اضغط على زر الكاميرا 📸 عشان ترفع صورتك."
+)
+_MSG_ORDER_CONFIRMED = "تم إرسال الطلب رقم %s بنجاح! طلبك الحين قيد المراجعة."
+_MSG_COMPLETE_FIELDS_FIRST = "يرجى إكمال المعلومات المطلوبة أولاً: %s"
+_MSG_MISSING_FIELDS = "Missing required information: %s"
+_MSG_CANNOT_CONFIRM = "Cannot confirm order. Missing: %s"
+_MSG_ORDER_FOUND = "Order %s found"
+_MSG_ORDER_NOT_FOUND = "Order %s not found"
+_MSG_ORDER_AMBIGUOUS = "Order number %s matches more than one order; please contact support"
+
+
+def _get_wazen_company_id():
+    """Resolve the Wazen company id once and keep it in the cache."""
+    cache_key = wazen_company_id_cache_key()
+    company_id = cache.get(cache_key)
+    if company_id is None:
+        company_id = Company.objects.filter(name='Wazen').values_list('id', flat=True).first()
+        # Only cache a hit, so a missing company is picked up once created
+        if company_id is not None:
+            cache.set(cache_key, company_id, timeout=WAZEN_COMPANY_ID_CACHE_TIMEOUT)
+    return company_id
+
+
+def _keyword_pattern(keyword_groups):
+    """
+    Compile {group: [keywords]} into one regex with a named group per entry.
+
+    Finds every group in a single pass over the text. The lookahead makes matches
+    overlap (e.g. "hi" inside "third party") like plain substring checks.
+    """
+    return re.compile('(?=%s)' % '|'.join(
+        f"(?P<{group}>{'|'.join(map(re.escape, keywords))})"
+        for group, keywords in keyword_groups.items()
+    ))
+
+
+# Alif variants fold to bare alif; diacritics (tashkeel) and tatweel are dropped
+_ARABIC_FOLD = str.maketrans(
+    {'إ': 'ا', 'أ': 'ا', 'آ': 'ا', '\u0640': None,
+     **{chr(code): None for code in range(0x064B, 0x0653)}}
+)
+
+
+def _normalize_arabic(text: str) -> str:
+    """Lower-case and fold Arabic spelling variants so one keyword matches them all."""
+    return text.lower().translate(_ARABIC_FOLD)
+
+
+# Intent keywords, matched in a single pass over the normalized query
+_INTENT_KEYWORDS = {
+    'greeting': ['مرحبا', 'السلام عليكم', 'hello', 'hi', 'أهلا', 'صباح الخير', 'مساء الخير'],
+    'order': ['طلب خدمة', 'أريد خدمة', 'احتاج خدمة', 'order service', 'need service', 'خدمة جديدة'],
+    # Also covers 'تأمين شامل' / 'تامين شامل'
+    'comprehensive': ['شامل'],
+    'third_party': ['ضد الغير'],
+    'third_party_en': ['third party'],
+    'insurance': ['تأمين', 'insurance'],
+}
+_INTENT_RE = _keyword_pattern({
+    group: [_normalize_arabic(keyword) for keyword in keywords]
+    for group, keywords in _INTENT_KEYWORDS.items()
+})
+
+
+@lru_cache(maxsize=256)
+def _classify_query(query_normalized: str) -> str:
+    """
+    Detect the intent of a query normalized with _normalize_arabic.
+
+    Pure function of the query text, so repeated messages (greetings in
+    particular) are answered from the LRU cache.
+    """
+    found = {match.lastgroup for match in _INTENT_RE.finditer(query_normalized)}
+
+    # 1. GREETING DETECTION
+    if 'greeting' in found:
+        return 'greeting'
+
+    # 2. SERVICE ORDER DETECTION
+    if 'order' in found:
+        # Check if user mentioned a specific service name with variations
+        if 'comprehensive' in found:
+            return 'order_comprehensive'
+        elif 'third_party' in found or 'third_party_en' in found:
+            return 'order_third_party'
+        return 'order'
+
+    # 3. DIRECT SERVICE NAME DETECTION
+    if found & {'insurance', 'comprehensive', 'third_party'}:
+        return 'service_name'
+
+    # 4. KNOWLEDGE QUESTIONS
+    return 'knowledge'
+
 
 class WazenAIAssistant(SAIAAIAssistantMixin, AIAssistant):
     """
@@ -44,6 +296,11 @@ class WazenAIAssistant(SAIAAIAssistantMixin, AIAssistant):
             'liability', 'الزامي', 'إلزامي'
         ]
     }
+    # Service type keywords plus general insurance terms, matched in one pass
+    _SERVICE_TYPE_RE = _keyword_pattern({
+        **SERVICE_KEYWORDS,
+        'insurance': ['تامين', 'تأمين', 'insurance']
+    })
     instructions = """
 🏢 **مساعد وازن الذكي**
 
@@ -126,6 +383,15 @@ class WazenAIAssistant(SAIAAIAssistantMixin, AIAssistant):
         # Initialize knowledge service lazily (will be created when first accessed)
         self._knowledge_service = None
 
+        # Active service order cache row, memoized for the lifetime of this instance
+        self._active_cache_entry = None
+
+        # Whether the user has earlier threads, looked up on first greeting
+        self._is_returning_cached = None
+
+        # Rendered services list reused by the fallback messages of one turn
+        self._services_text = None
+
         # Verify user belongs to Wazen company (skip during testing)
         if not self._verify_wazen_user():
             logger.warning("User verification failed - this should only be used by Wazen company users")
@@ -140,7 +406,7 @@ class WazenAIAssistant(SAIAAIAssistantMixin, AIAssistant):
             if error:
                 return {"error": "No valid user context"}
 
-            cache_key = f'wazen_orderable_services_{user.company.id}'
+            cache_key = orderable_services_cache_key(user.company_id)
             cached_data = cache.get(cache_key)
 
             return {
@@ -155,7 +421,7 @@ class WazenAIAssistant(SAIAAIAssistantMixin, AIAssistant):
     def _validate_user(self):
         """Validate user and return user object or error response tuple"""
         user = getattr(self, '_user', None)
-        if not user or not user.company:
+        if not user or not user.company_id:
             error = self._error_response("معلومات المستخدم غير متاحة")
             return None, error
         return user, None
@@ -169,15 +435,23 @@ class WazenAIAssistant(SAIAAIAssistantMixin, AIAssistant):
         }
         if error:
             response_data["error"] = error
-        return json.dumps(response_data, ensure_ascii=False)
+        return _dumps(response_data)
 
     def _success_response(self, data: dict) -> str:
         """Standardized success response format"""
-        return json.dumps({
+        return _dumps({
             "status": "success",
             "company": "Wazen",
             **data
-        }, ensure_ascii=False)
+        })
+
+    def _orderable_services_queryset(self, user):
+        """Base queryset of orderable services for the user's company"""
+        return Product.objects.filter(
+            company_id=user.company_id,
+            type='service',
+            is_service_orderable=True
+        ).order_by('name')
 
     def _get_orderable_services(self, user):
         """
@@ -187,56 +461,40 @@ class WazenAIAssistant(SAIAAIAssistantMixin, AIAssistant):
         Falls back gracefully if caching fails.
         """
         # Production-ready cache key with company isolation
-        cache_key = f'wazen_orderable_services_{user.company.id}'
+        cache_key = orderable_services_cache_key(user.company_id)
 
         try:
             # Try to get from Django cache first (thread-safe, auto-expiring)
             cached_services = cache.get(cache_key)
             if cached_services is not None:
-                logger.debug(f"Cache hit for orderable services (company: {user.company.id})")
+                logger.debug("Cache hit for orderable services (company: %s)", user.company_id)
                 return cached_services
 
             # Cache miss - fetch from database
-            logger.debug(f"Cache miss for orderable services (company: {user.company.id})")
-            services = Product.objects.filter(
-                company=user.company,
-                type='service',
-                is_service_orderable=True
-            ).select_related('company').order_by('name')
+            logger.debug("Cache miss for orderable services (company: %s)", user.company_id)
+            services = self._orderable_services_queryset(user).select_related('company')
 
             # Cache for 5 minutes (production-safe timeout)
             cache.set(cache_key, services, timeout=300)
-            logger.debug(f"Cached {services.count()} orderable services for company {user.company.id}")
+            logger.debug("Cached %s orderable services for company %s", services.count(), user.company_id)
 
             return services
 
         except Exception as e:
             # Graceful fallback if caching fails
-            logger.warning(f"Cache operation failed for orderable services: {e}")
-            return Product.objects.filter(
-                company=user.company,
-                type='service',
-                is_service_orderable=True
-            ).select_related('company').order_by('name')
+            logger.warning("Cache operation failed for orderable services: %s", e)
+            return self._orderable_services_queryset(user).select_related('company')
 
     def _invalidate_services_cache(self, company_id):
-        """
-        Invalidate the orderable services cache for a company.
-        Call this when services are added/updated/deleted.
-        """
-        cache_key = f'wazen_orderable_services_{company_id}'
-        try:
-            cache.delete(cache_key)
-            logger.debug(f"Invalidated orderable services cache for company {company_id}")
-        except Exception as e:
-            logger.warning(f"Failed to invalidate services cache: {e}")
+        """Invalidate the orderable services cache for a company."""
+        invalidate_services_cache(company_id)
 
     def _match_service_keywords(self, service_name: str):
         """Simple keyword matching helper"""
-        service_name_lower = service_name.lower().strip()
+        found = {match.lastgroup for match in self._SERVICE_TYPE_RE.finditer(service_name.lower())}
 
-        for service_type, keywords in self.SERVICE_KEYWORDS.items():
-            if any(keyword in service_name_lower for keyword in keywords):
+        for service_type in ('comprehensive', 'third_party', 'insurance'):
+            if service_type in found:
                 return service_type
         return None
 
@@ -252,20 +510,21 @@ class WazenAIAssistant(SAIAAIAssistantMixin, AIAssistant):
         """Verify that the user belongs to Wazen company"""
         user = getattr(self, '_user', None)
 
-        if not (user and hasattr(user, 'company') and user.company):
-            logger.warning(f"User {user.username if user else 'Unknown'} has no company")
+        company_id = getattr(user, 'company_id', None)
+        if not company_id:
+            logger.warning("User %s has no company", user.username if user else 'Unknown')
             return False
 
-        user_company = user.company.name
-        is_wazen = user_company == 'Wazen'
-        logger.info(f"User {user.username} company: {user_company}, is_wazen: {is_wazen}")
+        # Compare FK ids so the company row is not fetched just for its name
+        is_wazen = company_id == _get_wazen_company_id()
+        logger.info("User %s company_id: %s, is_wazen: %s", user.username, company_id, is_wazen)
         return is_wazen
 
     @method_tool
+    @_tool_error_handler("Failed to get Wazen invoices", "Failed to retrieve Wazen invoices")
     def get_wazen_invoices(self, limit: int = 30) -> str:
         """Get invoices for Wazen company."""
-        try:
-            query = """
+        query = """
             SELECT
                 id, invoice_number, customer_id, amount,
                 status, due_date, created_at
@@ -274,89 +533,80 @@ class WazenAIAssistant(SAIAAIAssistantMixin, AIAssistant):
             LIMIT %s
             """
 
-            results = self.client_service.execute_safe_query(query, [limit])
-
-            return self._success_response({
-                "invoices": results,
-                "count": len(results),
-                "message": f"Retrieved {len(results)} Wazen invoices"
-            })
+        results = self.client_service.execute_safe_query(query, [limit])
 
-        except Exception as e:
-            logger.error(f"Failed to get Wazen invoices: {e}")
-            return self._error_response("Failed to retrieve Wazen invoices", str(e))
+        return self._success_response({
+            "invoices": results,
+            "count": len(results),
+            "message": f"Retrieved {len(results)} Wazen invoices"
+        })
 
     @method_tool
+    @_tool_error_handler("Failed to get Wazen clients", "Failed to retrieve Wazen clients")
     def get_wazen_clients(self, limit: int = 15) -> str:
         """Get clients for Wazen company."""
-        try:
-            query = """
+        query = """
             SELECT
                 id, name, email, phone, company_id, created_at
             FROM contacts
             ORDER BY name
             LIMIT %s
             """
-            
-            results = self.client_service.execute_safe_query(query, [limit])
-            
-            return json.dumps({
-                "status": "success",
-                "company": "Wazen",
-                "clients": results,
-                "count": len(results),
-                "message": f"Retrieved {len(results)} Wazen clients"
-            }, default=str)
-            
-        except Exception as e:
-            logger.error(f"Failed to get Wazen clients: {e}")
-            return json.dumps({
-                "status": "error",
-                "company": "Wazen",
-                "error": str(e),
-                "message": "Failed to retrieve Wazen clients"
-            })
+        
+        results = self.client_service.execute_safe_query(query, [limit])
+        
+        return _dumps({
+            "status": "success",
+            "company": "Wazen",
+            "clients": results,
+            "count": len(results),
+            "message": f"Retrieved {len(results)} Wazen clients"
+        })
 
     @method_tool
+    @_tool_error_handler("Failed to get Wazen overview", "Failed to get Wazen overview")
     def get_wazen_overview(self) -> str:
         """Get business overview for Wazen company."""
-        try:
-            overview_queries = [
-                ("invoices", "SELECT COUNT(*) as count FROM invoices"),
-                ("clients", "SELECT COUNT(*) as count FROM contacts"),
-                ("companies", "SELECT COUNT(*) as count FROM companies")
-            ]
-            
-            overview = {}
-            for metric_name, query in overview_queries:
-                try:
-                    result = self.client_service.execute_safe_query(query)
-                    overview[metric_name] = result[0]['count'] if result else 0
-                except Exception as e:
-                    logger.warning(f"Could not get {metric_name}: {e}")
-                    overview[metric_name] = 0
-            
-            return json.dumps({
-                "status": "success",
-                "company": "Wazen",
-                "overview": overview,
-                "message": "Wazen business overview retrieved successfully"
-            })
-            
-        except Exception as e:
-            logger.error(f"Failed to get Wazen overview: {e}")
-            return json.dumps({
-                "status": "error",
-                "company": "Wazen",
-                "error": str(e),
-                "message": "Failed to get Wazen overview"
-            })
+        # All counts in one round trip to the client database
+        query = """
+            SELECT
+                (SELECT COUNT(*) FROM invoices) as invoices,
+                (SELECT COUNT(*) FROM contacts) as clients,
+                (SELECT COUNT(*) FROM companies) as companies
+            """
+
+        company_id = getattr(getattr(self, '_user', None), 'company_id', None)
+        cache_key = overview_counts_cache_key(company_id)
+        overview = cache.get(cache_key)
+
+        if overview is None:
+            try:
+                result = self.client_service.execute_safe_query(query)
+                counts = result[0] if result else {}
+            except Exception as e:
+                logger.warning("Could not get overview counts: %s", e)
+                counts = None
+
+            overview = {
+                metric_name: (counts or {}).get(metric_name) or 0
+                for metric_name in ("invoices", "clients", "companies")
+            }
+            # Only cache real counts, so a failed query is retried next time
+            if counts is not None:
+                cache.set(cache_key, overview, timeout=OVERVIEW_COUNTS_CACHE_TIMEOUT)
+
+        return _dumps({
+            "status": "success",
+            "company": "Wazen",
+            "overview": overview,
+            "message": "Wazen business overview retrieved successfully"
+        })
 
     @method_tool
+    @_tool_error_handler("Failed to analyze Wazen performance", "Failed to analyze Wazen performance")
     def analyze_wazen_performance(self) -> str:
         """Analyze business performance for Wazen."""
-        try:
-            query = """
+        query = """
             SELECT
                 COUNT(*) as total_invoices,
                 SUM(amount) as total_revenue,
@@ -365,29 +615,31 @@ class WazenAIAssistant(SAIAAIAssistantMixin, AIAssistant):
             WHERE created_at >= DATE_SUB(NOW(), INTERVAL 30 DAY)
             """
 
-            results = self.client_service.execute_safe_query(query)
-            performance = results[0] if results else {}
-
-            return json.dumps({
-                "status": "success",
-                "company": "Wazen",
-                "performance_metrics": {
-                    "total_invoices": performance.get('total_invoices', 0),
-                    "total_revenue": float(performance.get('total_revenue', 0)) if performance.get('total_revenue') else 0,
-                    "avg_invoice_value": float(performance.get('avg_invoice_value', 0)) if performance.get('avg_invoice_value') else 0
-                },
-                "period": "Last 30 days",
-                "message": "Wazen performance analysis completed successfully"
-            }, default=str)
+        results = self.client_service.execute_safe_query(query)
+        performance = results[0] if results else {}
 
-        except Exception as e:
-            logger.error(f"Failed to analyze Wazen performance: {e}")
-            return json.dumps({
-                "status": "error",
-                "company": "Wazen",
-                "error": str(e),
-                "message": "Failed to analyze Wazen performance"
-            })
+        return _dumps({
+            "status": "success",
+            "company": "Wazen",
+            "performance_metrics": {
+                "total_invoices": performance.get('total_invoices', 0),
+                "total_revenue": float(performance.get('total_revenue', 0)) if performance.get('total_revenue') else 0,
+                "avg_invoice_value": float(performance.get('avg_invoice_value', 0)) if performance.get('avg_invoice_value') else 0
+            },
+            "period": "Last 30 days",
+            "message": "Wazen performance analysis completed successfully"
+        })
+
+    # Intent tag (from _classify_query) -> handler(self, user_query)
+    _INTENT_HANDLERS = {
+        'greeting': lambda self, query: self._smart_greeting(),
+        'order_comprehensive': lambda self, query: self.select_service_by_name('تأمين شامل'),
+        'order_third_party': lambda self, query: self.select_service_by_name('ضد الغير'),
+        'order': lambda self, query: self._smart_service_initiation(),
+        'service_name': lambda self, query: self.select_service_by_name(query),
+        # Knowledge questions - enhanced search
+        'knowledge': lambda self, query: self._smart_knowledge_search(query),
+    }
 
     @method_tool
     def get_smart_response(self, user_query: str) -> str:
@@ -398,63 +650,25 @@ class WazenAIAssistant(SAIAAIAssistantMixin, AIAssistant):
         Automatically detects intent and provides the most relevant assistance.
         """
         try:
-            # Simple but effective context analysis
-            query_lower = user_query.lower()
-
-            # 1. GREETING DETECTION - Enhanced with context
-            greetings = ['مرحبا', 'السلام عليكم', 'hello', 'hi', 'أهلا', 'صباح الخير', 'مساء الخير']
-            if any(greeting in query_lower for greeting in greetings):
-                return self._smart_greeting()
-
-            # 2. SERVICE ORDER DETECTION - Context-aware
-            service_keywords = ['طلب خدمة', 'أريد خدمة', 'احتاج خدمة', 'order service', 'need service', 'خدمة جديدة']
-            if any(keyword in query_lower for keyword in service_keywords):
-                # Check if user mentioned a specific service name with variations
-                if ('تأمين شامل' in query_lower or 'تامين شامل' in query_lower or
-                    'شامل' in query_lower):
-                    return self.select_service_by_name('تأمين شامل')
-                elif ('ضد الغير' in query_lower or 'third party' in query_lower):
-                    return self.select_service_by_name('ضد الغير')
-                else:
-                    return self._smart_service_initiation()
-
-            # 3. DIRECT SERVICE NAME DETECTION - Use single method
-            if any(keyword in query_lower for keyword in ['تأمين', 'تامين', 'شامل', 'ضد الغير', 'insurance']):
-                return self.select_service_by_name(user_query)
-
-            # 4. KNOWLEDGE QUESTIONS - Enhanced search
-            return self._smart_knowledge_search(user_query)
+            intent = _classify_query(_normalize_arabic(user_query))
+            return self._INTENT_HANDLERS[intent](self, user_query)
 
         except Exception as e:
-            logger.error(f"Smart response error: {e}")
+            logger.error("Smart response error: %s", e)
             return "آسف، صار خطأ. إيش أقدر أساعدك فيه؟"
 
     def _smart_greeting(self) -> str:
         """Smart context-aware greeting"""
         # Check if returning user
-        is_returning = self._is_returning_user()
-        company_name = "وازن"
-
-        if is_returning:
-            return f"""وعليكم السلام ورحمة الله وبركاته! 🌟 أهلاً وسهلاً فيك مرة ثانية في {company_name}.
+        if self._is_returning_user():
+            return _GREETING_RETURNING
+        return _GREETING_NEW
 
-بناءً على كلامنا اللي فات، أقدر أساعدك في:
-• 🔍 الإجابة على أسئلتك حول التأمين والخدمات
-• 📋 متابعة أو طلب خدمات جديدة
-• 💡 أعطيك معلومات ودعم متخصص
-
-إيش أقدر أساعدك فيه اليوم؟"""
-        else:
-            return f"""وعليكم السلام ورحمة الله وبركاته! 👋
-
-أهلاً وسهلاً فيك في {company_name}! أنا مساعدك الذكي ومبسوط إني أخدمك.
-
-أقدر أساعدك في:
-🔍 **الاستفسارات**: إجابات دقيقة حول التأمين والخدمات
-📋 **طلب الخدمات**: إرشاد ذكي خلال عملية الطلب
-💡 **الدعم المتخصص**: مساعدة شخصية حسب احتياجاتك
-
-إيش اللي تبي تعرفه؟"""
+    def _get_services_text(self) -> str:
+        """Available services text, rendered once per assistant instance"""
+        if self._services_text is None:
+            self._services_text = self.get_available_services()
+        return self._services_text
 
     def _smart_service_initiation(self) -> str:
         """Smart service order initiation with context"""
@@ -462,7 +676,7 @@ class WazenAIAssistant(SAIAAIAssistantMixin, AIAssistant):
 
 خلني أعرض عليك الخدمات المتاحة مع معلومات مفصلة عشان تختار اللي يناسبك:
 
-{self.get_available_services()}"""
+{self._get_services_text()}"""
 
     def _handle_unavailable_service(self, requested_service: str) -> str:
         """Handle requests for services that don't exist in our database"""
@@ -470,10 +684,22 @@ class WazenAIAssistant(SAIAAIAssistantMixin, AIAssistant):
 
 بس أقدر أساعدك في الخدمات المتاحة عندنا:
 
-{self.get_available_services()}
+{self._get_services_text()}
 
 تبي تطلب وحدة من هذي الخدمات المتاحة؟"""
 
+    def _get_service_names(self, user):
+        """Lower-cased orderable service names for the user's company (cached)"""
+        cache_key = service_names_cache_key(user.company_id)
+        names = cache.get(cache_key)
+        if names is None:
+            names = [
+                name.lower()
+                for name in self._orderable_services_queryset(user).values_list('name', flat=True)
+            ]
+            cache.set(cache_key, names, timeout=SERVICES_CACHE_TIMEOUT)
+        return names
+
     def _validate_service_exists(self, service_name: str) -> bool:
         """Check if a service exists in our database"""
         try:
@@ -481,9 +707,9 @@ class WazenAIAssistant(SAIAAIAssistantMixin, AIAssistant):
             if error:
                 return False
 
-            return self._get_orderable_services(user).filter(
-                name__icontains=service_name
-            ).exists()
+            # Same partial match as name__icontains, done in memory
+            needle = service_name.lower()
+            return any(needle in name for name in self._get_service_names(user))
         except Exception:
             return False
 
@@ -514,17 +740,24 @@ class WazenAIAssistant(SAIAAIAssistantMixin, AIAssistant):
 
     def _is_returning_user(self) -> bool:
         """Check if user has previous interactions"""
-        try:
-            from django_ai_assistant.models import Thread
-            return Thread.objects.filter(created_by=self.user).exists()
-        except:
+        if self._is_returning_cached is not None:
+            return self._is_returning_cached
+
+        user = getattr(self, '_user', None)
+        if not user:
+            self._is_returning_cached = False
             return False
 
-    def _cached_knowledge_search(self, query: str, limit: int = 10):
+        try:
+            self._is_returning_cached = Thread.objects.filter(created_by=user).exists()
+        except DatabaseError:
+            self._is_returning_cached = False
+        return self._is_returning_cached
+
+    def _cached_knowledge_search(self, query: str, limit: int = 10, content_max: int = None):
         """Cached knowledge search to improve performance."""
         # Use Django cache framework instead of lru_cache for instance methods
-        from django.core.cache import cache
-        cache_key = f"wazen_knowledge_{hash(query)}_{limit}"
+        cache_key = f"wazen_knowledge_{hash(query)}_{limit}_{content_max}"
 
         # Try to get from cache first
         results = cache.get(cache_key)
@@ -532,124 +765,104 @@ class WazenAIAssistant(SAIAAIAssistantMixin, AIAssistant):
             return results
 
         # If not in cache, search and cache the results
-        results = self.knowledge_service.search_knowledge(query, limit=limit)
+        results = self.knowledge_service.search_knowledge(query, limit=limit, content_max=content_max)
         cache.set(cache_key, results, timeout=300)  # Cache for 5 minutes
         return results
 
     @method_tool
+    @_tool_error_handler("Failed to search Wazen knowledge", "Failed to search Wazen knowledge base")
     def search_wazen_knowledge(self, query: str, limit: int = 10) -> str:
         """Search Wazen company knowledge base for information."""
-        try:
-            # Use cached search for better performance
-            results = self._cached_knowledge_search(query, limit=limit)
+        # Use cached search for better performance
+        # Content is truncated to 500 characters by the knowledge service
+        results = self._cached_knowledge_search(query, limit=limit, content_max=500)
 
-            if not results:
-                return json.dumps({
-                    "status": "success",
-                    "company": "Wazen",
-                    "results": [],
-                    "count": 0,
-                    "message": f"No knowledge base results found for query: {query}"
-                })
-
-            # Format results for better readability
-            formatted_results = []
-            for result in results:
-                formatted_results.append({
-                    "title": result.get('title', 'Untitled'),
-                    "content": result.get('content', '')[:500] + ('...' if len(result.get('content', '')) > 500 else ''),
-                    "type": result.get('type', 'unknown'),
-                    "category": result.get('category', 'General')
-                })
-
-            return json.dumps({
+        if not results:
+            return _dumps({
                 "status": "success",
                 "company": "Wazen",
-                "results": formatted_results,
-                "count": len(results),
-                "message": f"Found {len(results)} knowledge base results for: {query}"
-            }, ensure_ascii=False)
+                "results": [],
+                "count": 0,
+                "message": f"No knowledge base results found for query: {query}"
+            })
 
-        except Exception as e:
-            logger.error(f"Failed to search Wazen knowledge: {e}")
-            return json.dumps({
-                "status": "error",
-                "company": "Wazen",
-                "error": str(e),
-                "message": f"Failed to search Wazen knowledge base"
+        # Format results for better readability
+        formatted_results = []
+        for result in results:
+            formatted_results.append({
+                "title": result.get('title', 'Untitled'),
+                "content": result.get('content', ''),
+                "type": result.get('type', 'unknown'),
+                "category": result.get('category', 'General')
             })
 
+        return _dumps({
+            "status": "success",
+            "company": "Wazen",
+            "results": formatted_results,
+            "count": len(results),
+            "message": f"Found {len(results)} knowledge base results for: {query}"
+        })
+
     @method_tool
+    @_tool_error_handler("Failed to get Wazen company info", "Failed to retrieve Wazen company information")
     def get_wazen_company_info(self) -> str:
         """Get comprehensive information about Wazen company."""
-        try:
-            # Search for company information in knowledge base
-            company_queries = [
-                "عن Wazen",
-                "من هي Wazen",
-                "about Wazen",
-                "company information",
-                "من نحن"
-            ]
-
-            all_results = []
-            for query in company_queries:
-                results = self.knowledge_service.search_knowledge(query, limit=3)
-                all_results.extend(results)
-
-            # Remove duplicates and get top results
-            seen_titles = set()
-            unique_results = []
-            for result in all_results:
-                title = result.get('title', '')
-                if title not in seen_titles:
-                    seen_titles.add(title)
-                    unique_results.append(result)
-                    if len(unique_results) >= 5:
-                        break
-
-            if not unique_results:
-                return json.dumps({
-                    "status": "success",
-                    "company": "Wazen",
-                    "info": [],
-                    "message": "No company information found in knowledge base"
-                })
+        company_id = getattr(getattr(self, '_user', None), 'company_id', None)
+        cache_key = company_info_cache_key(company_id)
+        if company_id:
+            cached_response = cache.get(cache_key)
+            if cached_response is not None:
+                return cached_response
+
+        # Search for company information in knowledge base
+        company_queries = [
+            "عن Wazen",
+            "من هي Wazen",
+            "about Wazen",
+            "company information",
+            "من نحن"
+        ]
 
-            # Format company information
-            company_info = []
-            for result in unique_results:
-                company_info.append({
-                    "title": result.get('title', 'Company Information'),
-                    "content": result.get('content', ''),
-                    "type": result.get('type', 'info')
-                })
+        # One search over all phrasings; results are already unique articles
+        unique_results = self.knowledge_service.search_knowledge_batch(company_queries, limit=5)
 
-            return json.dumps({
+        if not unique_results:
+            return _dumps({
                 "status": "success",
                 "company": "Wazen",
-                "info": company_info,
-                "count": len(company_info),
-                "message": f"Retrieved comprehensive Wazen company information"
-            }, ensure_ascii=False)
+                "info": [],
+                "message": "No company information found in knowledge base"
+            })
 
-        except Exception as e:
-            logger.error(f"Failed to get Wazen company info: {e}")
-            return json.dumps({
-                "status": "error",
-                "company": "Wazen",
-                "error": str(e),
-                "message": f"Failed to retrieve Wazen company information"
+        # Format company information
+        company_info = []
+        for result in unique_results:
+            company_info.append({
+                "title": result.get('title', 'Company Information'),
+                "content": result.get('content', ''),
+                "type": result.get('type', 'info')
             })
 
+        response = _dumps({
+            "status": "success",
+            "company": "Wazen",
+            "info": company_info,
+            "count": len(company_info),
+            "message": "Retrieved comprehensive Wazen company information"
+        })
+        if company_id:
+            cache.set(cache_key, response, timeout=COMPANY_INFO_CACHE_TIMEOUT)
+        return response
+
     # ==================== SERVICE ORDERING METHODS ====================
 
     def _get_session_key(self):
-        """Generate a unique session key for caching"""
+        """Session key for caching; one active service order session per user"""
         user = getattr(self, '_user', None)
         if user:
-            return f"wazen_service_order_{user.id}_{timezone.now().strftime('%Y%m%d_%H%M%S')}"
-        return f"wazen_service_order_anonymous_{timezone.now().strftime('%Y%m%d_%H%M%S')}"
+            return f"wazen_service_order_{user.id}"
+        return f"wazen_service_order_anonymous_{uuid.uuid4().hex}"
 
     def _get_active_cache_entry(self):
         """
@@ -659,15 +872,20 @@ class WazenAIAssistant(SAIAAIAssistantMixin, AIAssistant):
         Returns:
             ServiceOrderCache or None
         """
+        cache_entry = self._active_cache_entry
+        if cache_entry and not cache_entry.is_expired:
+            return cache_entry
+
         user = getattr(self, '_user', None)
-        if not user or not user.company:
+        if not user or not user.company_id:
             return None
 
-        return ServiceOrderCache.objects.filter(
+        self._active_cache_entry = ServiceOrderCache.objects.select_related('service').filter(
             user=user,
-            company=user.company,
-            expires_at__gt=timezone.now()
+            company_id=user.company_id,
+            expires_at__gt=_now()
         ).first()
+        return self._active_cache_entry
 
     def _get_cache_or_error(self):
         """
@@ -679,13 +897,50 @@ class WazenAIAssistant(SAIAAIAssistantMixin, AIAssistant):
         """
         cache_entry = self._get_active_cache_entry()
         if not cache_entry:
-            error_response = json.dumps({
-                "status": "error",
-                "message": "لا يوجد طلب خدمة نشط. ابدأ بطلب خدمة جديدة."
-            }, ensure_ascii=False)
-            return None, error_response
+            return None, _ERR_NO_ACTIVE_ORDER
         return cache_entry, None
 
+    def _update_cached_data(self, cache_entry, **changes):
+        """
+        Merge changes into the cache entry's data with a single write.
+
+        Nothing is written when every value is already cached, so repeated
+        tool calls with the same input do not hit the database. On PostgreSQL
+        only the changed keys are sent and merged server-side (jsonb ||).
+        """
+        if changes.items() <= cache_entry.cached_data.items():
+            return
+
+        cache_entry.cached_data.update(changes)
+
+        db = router.db_for_write(ServiceOrderCache, instance=cache_entry)
+        if connections[db].vendor != 'postgresql':
+            cache_entry.save(update_fields=['cached_data', 'updated_at'])
+            return
+
+        updated_at = _now()
+        ServiceOrderCache.objects.using(db).filter(pk=cache_entry.pk).update(
+            cached_data=Func(
+                F('cached_data'),
+                Value(changes, output_field=JSONField()),
+                template='(%(expressions)s)',
+                arg_joiner=' || ',
+                output_field=JSONField()
+            ),
+            updated_at=updated_at
+        )
+        cache_entry.updated_at = updated_at
+
+    def _collection_status(self, cache_entry):
+        """
+        Get the missing fields and the next collection step in one call.
+
+        Returns:
+            tuple: (missing_fields, next_step)
+        """
+        missing_fields = cache_entry.get_missing_fields()
+        return missing_fields, self._determine_next_step(missing_fields)
+
     def _determine_next_step(self, missing_fields):
         """
         Determine the next step in the data collection process.
@@ -696,15 +951,12 @@ class WazenAIAssistant(SAIAAIAssistantMixin, AIAssistant):
         Returns:
             str: Next step identifier
         """
-        if "customer_age" in missing_fields:
-            return "collect_age"
-        elif "customer_id" in missing_fields:
-            return "collect_id"
-        elif "customer_phone" in missing_fields:
-            return "collect_phone"
-        else:
-            # All basic fields collected, now check for image
-            return "collect_image"
+        # missing_fields follows ServiceOrderCache.REQUIRED_FIELDS order;
+        # once age, ID and phone are collected, move on to the image
+        return next(
+            (_NEXT_STEP[field] for field in missing_fields if field in _NEXT_STEP),
+            "collect_image"
+        )
 
     def _get_or_create_cache(self, session_key=None):
         """Get or create a cache entry for the current session"""
@@ -716,330 +968,272 @@ class WazenAIAssistant(SAIAAIAssistantMixin, AIAssistant):
             session_key = self._get_session_key()
 
         try:
-            # Clean up expired cache entries first
-            ServiceOrderCache.objects.filter(
-                user=user,
-                company=user.company,
-                expires_at__lte=timezone.now()
-            ).delete()
-
-            # Try to get existing non-expired cache
-            existing_cache = ServiceOrderCache.objects.filter(
-                user=user,
-                company=user.company,
-                expires_at__gt=timezone.now()
-            ).first()
-
-            if existing_cache:
-                return existing_cache
-
-            # No existing cache found, create new one atomically
-            expires_at = timezone.now() + timedelta(minutes=30)
-            cache_entry, created = ServiceOrderCache.objects.get_or_create(
+            # Single lookup on the unique session key, creating the row atomically
+            expires_at = _now() + timedelta(minutes=30)
+            cache_entry, created = ServiceOrderCache.objects.select_related('service').get_or_create(
                 session_key=session_key,
                 defaults={
                     'user': user,
-                    'company': user.company,
+                    'company_id': user.company_id,
                     'expires_at': expires_at,
                     'cached_data': {}
                 }
             )
 
+            if created:
+                # First session on the per-user key: drop the user's rows left
+                # under the old timestamped keys, which nothing reads any more
+                ServiceOrderCache.objects.filter(user=user).exclude(pk=cache_entry.pk).delete()
+            elif cache_entry.is_expired:
+                # The previous session timed out; start a fresh one in the same row
+                cache_entry.service = None
+                cache_entry.cached_data = {}
+                cache_entry.expires_at = expires_at
+                cache_entry.save(update_fields=['service', 'cached_data', 'expires_at', 'updated_at'])
+
+            self._active_cache_entry = cache_entry
             return cache_entry
         except Exception as e:
-            logger.error(f"Failed to get/create cache: {e}")
+            logger.error("Failed to get/create cache: %s", e)
             return None
 
     @method_tool
+    @_tool_error_handler("Failed to get available services", "خطأ في استرجاع الخدمات")
     def get_available_services(self) -> str:
         """Get list of available services that can be ordered through the AI assistant."""
-        try:
-            user, error = self._validate_user()
-            if error:
-                return error
+        user, error = self._validate_user()
+        if error:
+            return error
 
-            # Get orderable services using helper method
-            services = self._get_orderable_services(user)
+        cache_key = services_text_cache_key(user.company_id)
+        cached_text = cache.get(cache_key)
+        if cached_text is not None:
+            return cached_text
 
-            if not services.exists():
-                return "❌ لا توجد خدمات متاحة للطلب حالياً"
+        # Only the displayed columns are fetched, as plain dicts
+        services = list(self._orderable_services_queryset(user).values(
+            'id', 'name', 'price', 'service_description'
+        ))
 
-            # Format services for display
-            services_text = "📋 **الخدمات المتاحة للطلب:**\n\n"
+        if not services:
+            return "❌ لا توجد خدمات متاحة للطلب حالياً"
 
-            for i, service in enumerate(services, 1):
-                services_text += f"{i}. **{service.name}**\n"
-                services_text += f"   💰 السعر: {service.price} ريال\n"
-                if service.service_description:
-                    services_text += f"   📝 الوصف: {service.service_description}\n"
-                services_text += f"   🆔 رقم الخدمة: {service.id}\n\n"
+        # Format services for display
+        parts = ["📋 **الخدمات المتاحة للطلب:**\n\n"]
 
-            services_text += "✨ **لطلب خدمة معينة، قل: \"أريد طلب خدمة رقم [رقم الخدمة]\"**"
+        for i, service in enumerate(services, 1):
+            parts.append(f"{i}. **{service['name']}**\n")
+            parts.append(f"   💰 السعر: {service['price']} ريال\n")
+            if service['service_description']:
+                parts.append(f"   📝 الوصف: {service['service_description']}\n")
+            parts.append(f"   🆔 رقم الخدمة: {service['id']}\n\n")
 
-            return services_text
+        parts.append("✨ **لطلب خدمة معينة، قل: \"أريد طلب خدمة رقم [رقم الخدمة]\"**")
+        services_text = ''.join(parts)
 
-        except Exception as e:
-            logger.error(f"Failed to get available services: {e}")
-            return self._error_response("خطأ في استرجاع الخدمات", str(e))
+        cache.set(cache_key, services_text, timeout=SERVICES_CACHE_TIMEOUT)
+        return services_text
 
     @method_tool
+    @_tool_error_handler("Failed to select service by name", "خطأ في اختيار الخدمة")
     def select_service_by_name(self, service_name: str) -> str:
         """Select a service by name and initiate the data collection process."""
-        try:
-            user, error = self._validate_user()
-            if error:
-                return error
-
-            # Find service by name (case-insensitive, partial match)
-            services = self._get_orderable_services(user)
-            service = services.filter(name__icontains=service_name).first()
-
-            if not service:
-                # Try keyword matching using helper method
-                service_type = self._match_service_keywords(service_name)
-
-                if service_type == 'comprehensive':
-                    service = services.filter(name__icontains='شامل').first()
-                elif service_type == 'third_party':
-                    service = services.filter(name__icontains='ضد الغير').first()
-                elif any(keyword in service_name.lower() for keyword in ['تامين', 'تأمين', 'insurance']):
-                    # Default to comprehensive for general insurance terms
-                    service = services.filter(name__icontains='شامل').first()
+        user, error = self._validate_user()
+        if error:
+            return error
+
+        # Find service by name (case-insensitive, partial match), falling back
+        # to the service matching its keywords - both in a single query
+        services = self._get_orderable_services(user)
+        name_match = Q(name__icontains=service_name)
+        alias = _SERVICE_TYPE_ALIASES.get(self._match_service_keywords(service_name))
+        if alias:
+            services = services.filter(name_match | Q(name__icontains=alias)).order_by(
+                Case(When(name_match, then=0), default=1), 'name'
+            )
+        else:
+            services = services.filter(name_match)
+        service = services.first()
 
-            if not service:
-                return f"""ما أقدر ألقى خدمة "{service_name}".
+        if not service:
+            return f"""ما أقدر ألقى خدمة "{service_name}".
 
 الخدمات المتاحة عندنا هي:
 
-{self.get_available_services()}
+{self._get_services_text()}
 
 اختار وحدة من الخدمات المتاحة فوق."""
 
-            # Use the existing select_service_for_order method
-            return self.select_service_for_order(str(service.id))
-
-        except Exception as e:
-            logger.error(f"Failed to select service by name: {e}")
-            return self._error_response("خطأ في اختيار الخدمة", str(e))
+        # Use the existing select_service_for_order method
+        return self.select_service_for_order(str(service.id))
 
     @method_tool
+    @_tool_error_handler("Failed to select service", "Failed to select service for ordering")
     def select_service_for_order(self, service_id: str) -> str:
         """Select a service and initiate the data collection process."""
-        try:
-            user, error = self._validate_user()
-            if error:
-                return error
-
-            # Validate service exists and is orderable
-            try:
-                service = self._get_orderable_services(user).get(id=service_id)
-            except Product.DoesNotExist:
-                return self._error_response(f"Service with ID {service_id} not found or not orderable")
-
-            # Create or update cache entry
-            cache_entry = self._get_or_create_cache()
-            if not cache_entry:
-                return json.dumps({
-                    "status": "error",
-                    "message": "Failed to initialize service order session"
-                })
-
-            # Update cache with selected service
-            cache_entry.service = service
-            cache_entry.cached_data = {
-                'service_id': service_id,
-                'service_name': service.name,
-                'service_price': service.price,
-                'requires_customer_info': service.requires_customer_info
-            }
-            cache_entry.save()
+        user, error = self._validate_user()
+        if error:
+            return error
 
-            return json.dumps({
-                "status": "success",
-                "company": "Wazen",
-                "service": {
-                    "id": service.id,
-                    "name": service.name,
-                    "price": service.price,
-                    "description": service.service_description
-                },
-                "session_key": cache_entry.session_key,
-                "next_step": "collect_customer_information",
-                "message": f"تم اختيار خدمة '{service.name}' بنجاح! 🎉\n\nالحين أحتاج أجمع معلوماتك الشخصية عشان نكمل الطلب:\n\n📝 **المعلومات المطلوبة:**\n• الاسم الكامل\n• العمر\n• رقم الهوية\n• رقم الجوال\n• الصورة الشخصية\n\nابدأ بإعطائي اسمك الكامل."
-            }, ensure_ascii=False)
+        # Validate service exists and is orderable
+        try:
+            service = self._get_orderable_services(user).get(id=service_id)
+        except Product.DoesNotExist:
+            return self._error_response(f"Service with ID {service_id} not found or not orderable")
 
-        except Exception as e:
-            logger.error(f"Failed to select service: {e}")
-            return json.dumps({
+        # Create or update cache entry
+        cache_entry = self._get_or_create_cache()
+        if not cache_entry:
+            return _dumps({
                 "status": "error",
-                "company": "Wazen",
-                "error": str(e),
-                "message": "Failed to select service for ordering"
+                "message": "Failed to initialize service order session"
             })
 
+        # Update cache with selected service
+        cache_entry.service = service
+        cache_entry.cached_data = {
+            'service_id': service_id,
+            'service_name': service.name,
+            'service_price': service.price,
+            'requires_customer_info': service.requires_customer_info
+        }
+        cache_entry.save(update_fields=['service', 'cached_data', 'updated_at'])
+        self._services_text = None
+
+        return _dumps({
+            "status": "success",
+            "company": "Wazen",
+            "service": {
+                "id": service.id,
+                "name": service.name,
+                "price": service.price,
+                "description": service.service_description
+            },
+            "session_key": cache_entry.session_key,
+            "next_step": "collect_customer_information",
+            "message": _MSG_SERVICE_SELECTED % service.name
+        })
+
     @method_tool
+    @_tool_error_handler("Failed to collect customer name", "Failed to collect customer name")
     def collect_customer_name(self, customer_name: str) -> str:
         """Collect and validate customer name."""
-        try:
-            user, error = self._validate_user()
-            if error:
-                return error
+        user, error = self._validate_user()
+        if error:
+            return error
 
-            # Validate name format
-            if not customer_name or len(customer_name.strip()) < 2:
-                return self._error_response("اكتب الاسم كامل (على الأقل حرفين)")
+        # Validate name format
+        if not customer_name or len(customer_name.strip()) < 2:
+            return self._error_response("اكتب الاسم كامل (على الأقل حرفين)")
 
-            # Clean name - accept any name with letters and spaces
-            clean_name = customer_name.strip()
-            # Only reject if completely empty or too short
-            if len(clean_name) < 2:
-                return self._error_response("اكتب الاسم كامل")
+        # Clean name - accept any name with letters and spaces
+        clean_name = customer_name.strip()
+        # Only reject if completely empty or too short
+        if len(clean_name) < 2:
+            return self._error_response("اكتب الاسم كامل")
 
-            # Validate full name (must have at least 2 words)
-            name_parts = clean_name.split()
-            if len(name_parts) < 2:
-                return self._error_response("اكتب الاسم كامل (الاسم الأول والعائلة على الأقل)")
+        # Validate full name (must have at least 2 words)
+        if not _FULL_NAME_RE.search(clean_name):
+            return self._error_response("اكتب الاسم كامل (الاسم الأول والعائلة على الأقل)")
 
-            # Get current cache entry using helper method
-            cache_entry, error_response = self._get_cache_or_error()
-            if error_response:
-                return error_response
+        # Get current cache entry using helper method
+        cache_entry, error_response = self._get_cache_or_error()
+        if error_response:
+            return error_response
 
-            # Update cached data
-            cache_entry.cached_data['customer_name'] = clean_name
-            cache_entry.save()
+        # Update cached data
+        self._update_cached_data(cache_entry, customer_name=clean_name)
 
-            # Check what's still missing
-            missing_fields = cache_entry.get_missing_fields()
+        # Check what's still missing
+        missing_fields, next_step = self._collection_status(cache_entry)
 
-            return json.dumps({
-                "status": "success",
-                "company": "Wazen",
-                "collected": {
-                    "customer_name": clean_name
-                },
-                "missing_fields": missing_fields,
-                "next_step": self._determine_next_step(missing_fields),
-                "message": f"تم جمع اسمك بنجاح: {clean_name}. باقي {len(missing_fields)} معلومات."
-            }, ensure_ascii=False)
-
-        except Exception as e:
-            logger.error(f"Failed to collect customer name: {e}")
-            return json.dumps({
-                "status": "error",
-                "company": "Wazen",
-                "error": str(e),
-                "message": "Failed to collect customer name"
-            })
+        return _dumps({
+            "status": "success",
+            "company": "Wazen",
+            "collected": {
+                "customer_name": clean_name
+            },
+            "missing_fields": missing_fields,
+            "next_step": next_step,
+            "message": _MSG_NAME_OK % (clean_name, len(missing_fields))
+        })
 
     @method_tool
+    @_tool_error_handler("Failed to collect customer age", "Failed to collect customer age")
     def collect_customer_age(self, customer_age: str) -> str:
         """Collect and validate customer age."""
-        try:
-            user, error = self._validate_user()
-            if error:
-                return error
-
-            # Validate and convert age
-            try:
-                age = int(customer_age)
-                if age < 18 or age > 120:
-                    return json.dumps({
-                        "status": "error",
-                        "message": "العمر يجب أن يكون بين 18 و 120 سنة"
-                    }, ensure_ascii=False)
-            except ValueError:
-                return json.dumps({
-                    "status": "error",
-                    "message": "اكتب العمر بالأرقام"
-                }, ensure_ascii=False)
+        user, error = self._validate_user()
+        if error:
+            return error
 
-            # Get current cache entry using helper method
-            cache_entry, error_response = self._get_cache_or_error()
-            if error_response:
-                return error_response
+        # Validate and convert age
+        try:
+            age = int(customer_age)
+            if age < 18 or age > 120:
+                return _ERR_AGE_RANGE
+        except ValueError:
+            return _ERR_AGE_NOT_NUMBER
 
-            # Update cached data
-            cache_entry.cached_data['customer_age'] = age
-            cache_entry.save()
+        # Get current cache entry using helper method
+        cache_entry, error_response = self._get_cache_or_error()
+        if error_response:
+            return error_response
 
-            # Check what's still missing
-            missing_fields = cache_entry.get_missing_fields()
+        # Update cached data
+        self._update_cached_data(cache_entry, customer_age=age)
 
-            return json.dumps({
-                "status": "success",
-                "company": "Wazen",
-                "collected": {
-                    "customer_age": age
-                },
-                "missing_fields": missing_fields,
-                "next_step": self._determine_next_step(missing_fields),
-                "message": f"تم جمع عمرك بنجاح: {age} سنة. باقي {len(missing_fields)} معلومات."
-            }, ensure_ascii=False)
+        # Check what's still missing
+        missing_fields, next_step = self._collection_status(cache_entry)
 
-        except Exception as e:
-            logger.error(f"Failed to collect customer age: {e}")
-            return json.dumps({
-                "status": "error",
-                "company": "Wazen",
-                "error": str(e),
-                "message": "Failed to collect customer age"
-            })
+        return _dumps({
+            "status": "success",
+            "company": "Wazen",
+            "collected": {
+                "customer_age": age
+            },
+            "missing_fields": missing_fields,
+            "next_step": next_step,
+            "message": _MSG_AGE_OK % (age, len(missing_fields))
+        })
 
     @method_tool
+    @_tool_error_handler("Failed to collect customer ID", "Failed to collect customer ID")
     def collect_customer_id(self, customer_id: str) -> str:
         """Collect and validate customer ID."""
-        try:
-            user, error = self._validate_user()
-            if error:
-                return error
+        user, error = self._validate_user()
+        if error:
+            return error
 
-            # Validate ID format - must be exactly 10 digits
-            clean_id = customer_id.strip()
-            if not clean_id:
-                return json.dumps({
-                    "status": "error",
-                    "message": "اكتب رقم الهوية"
-                }, ensure_ascii=False)
+        # Validate ID format - must be exactly 10 digits
+        clean_id = customer_id.strip()
+        if not clean_id:
+            return _ERR_ID_EMPTY
 
-            # Must be exactly 10 digits
-            if not clean_id.isdigit() or len(clean_id) != 10:
-                return json.dumps({
-                    "status": "error",
-                    "message": "رقم الهوية يجب أن يكون 10 أرقام بالضبط"
-                }, ensure_ascii=False)
+        # Must be exactly 10 digits
+        if not _ID_RE.fullmatch(clean_id):
+            return _ERR_ID_FORMAT
 
-            # Get current cache entry using helper method
-            cache_entry, error_response = self._get_cache_or_error()
-            if error_response:
-                return error_response
+        # Get current cache entry using helper method
+        cache_entry, error_response = self._get_cache_or_error()
+        if error_response:
+            return error_response
 
-            # Update cached data
-            cache_entry.cached_data['customer_id'] = clean_id
-            cache_entry.save()
+        # Update cached data
+        self._update_cached_data(cache_entry, customer_id=clean_id)
 
-            # Check what's still missing
-            missing_fields = cache_entry.get_missing_fields()
+        # Check what's still missing
+        missing_fields, next_step = self._collection_status(cache_entry)
 
-            return json.dumps({
-                "status": "success",
-                "company": "Wazen",
-                "collected": {
-                    "customer_id": clean_id
-                },
-                "missing_fields": missing_fields,
-                "next_step": self._determine_next_step(missing_fields),
-                "message": f"تم جمع رقم هويتك بنجاح: {clean_id}. باقي {len(missing_fields)} معلومات."
-            }, ensure_ascii=False)
-
-        except Exception as e:
-            logger.error(f"Failed to collect customer ID: {e}")
-            return json.dumps({
-                "status": "error",
-                "company": "Wazen",
-                "error": str(e),
-                "message": "Failed to collect customer ID"
-            })
+        return _dumps({
+            "status": "success",
+            "company": "Wazen",
+            "collected": {
+                "customer_id": clean_id
+            },
+            "missing_fields": missing_fields,
+            "next_step": next_step,
+            "message": _MSG_ID_OK % (clean_id, len(missing_fields))
+        })
 
     @method_tool
     def collect_customer_phone(self, phone_number: str) -> str:
@@ -1059,39 +1253,25 @@ class WazenAIAssistant(SAIAAIAssistantMixin, AIAssistant):
                 return error_response
 
             # Clean and validate phone number
-            clean_phone = phone_number.strip().replace(' ', '').replace('-', '')
+            clean_phone = phone_number.translate(_PHONE_STRIP).strip()
 
             # Validation: 9 digits starting with 5, or 10 digits starting with 05
             if not clean_phone.isdigit():
-                return json.dumps({
-                    "status": "error",
-                    "message": "رقم الهاتف يجب أن يحتوي على أرقام فقط"
-                }, ensure_ascii=False)
-
-            # Check format: 9 digits starting with 5 OR 10 digits starting with 05
-            if len(clean_phone) == 9 and clean_phone.startswith('5'):
-                # Valid 9-digit format
-                pass
-            elif len(clean_phone) == 10 and clean_phone.startswith('05'):
-                # Valid 10-digit format
-                pass
-            else:
-                return json.dumps({
-                    "status": "error",
-                    "message": "رقم الهاتف يجب أن يكون 9 أرقام تبدأ بـ 5، أو 10 أرقام تبدأ بـ 05"
-                }, ensure_ascii=False)
+                return _ERR_PHONE_NOT_DIGITS
+
+            if not _PHONE_RE.fullmatch(clean_phone):
+                return _ERR_PHONE_FORMAT
 
             # Store phone number
-            cache_entry.cached_data['customer_phone'] = clean_phone
-            cache_entry.save()
+            self._update_cached_data(cache_entry, customer_phone=clean_phone)
 
             # Check remaining fields
-            missing_fields = cache_entry.get_missing_fields()
+            missing_fields, next_step = self._collection_status(cache_entry)
 
             # Check if this was the last basic field
             if not missing_fields:
                 # All basic fields collected, now ask for image
-                return json.dumps({
+                return _dumps({
                     "status": "success",
                     "company": "Wazen",
                     "collected": {
@@ -1099,28 +1279,28 @@ class WazenAIAssistant(SAIAAIAssistantMixin, AIAssistant):
                     },
                     "missing_fields": missing_fields,
                     "next_step": "collect_image",
-                    "message": f"رقم الجوال '{clean_phone}' تم حفظه بنجاح. ✅ خلاص جمعنا كل المعلومات الأساسية!\n\n📸 الحين نحتاج صورتك الشخصية عشان نكمل الطلب. اضغط على زر الكاميرا 📸 عشان ترفع صورتك.",
+                    "message": _MSG_PHONE_DONE % clean_phone,
                     "image_required": True,
                     "action_needed": "ارفع صورتك الشخصية باستخدام زر الكاميرا 📸"
-                }, ensure_ascii=False)
+                })
             else:
-                return json.dumps({
+                return _dumps({
                     "status": "success",
                     "company": "Wazen",
                     "collected": {
                         "customer_phone": clean_phone
                     },
                     "missing_fields": missing_fields,
-                    "next_step": self._determine_next_step(missing_fields),
-                    "message": f"رقم الجوال '{clean_phone}' تم حفظه بنجاح. باقي {len(missing_fields)} حقول."
-                }, ensure_ascii=False)
+                    "next_step": next_step,
+                    "message": _MSG_PHONE_OK % (clean_phone, len(missing_fields))
+                })
 
         except Exception as e:
-            logger.error(f"Failed to collect customer phone: {e}")
-            return json.dumps({
+            logger.error("Failed to collect customer phone: %s", e)
+            return _dumps({
                 "status": "error",
                 "message": "حدث خطأ أثناء حفظ رقم الهاتف. يرجى المحاولة مرة أخرى."
-            }, ensure_ascii=False)
+            })
 
     @method_tool
     def process_image_upload_confirmation(self, message: str) -> str:
@@ -1135,23 +1315,20 @@ class WazenAIAssistant(SAIAAIAssistantMixin, AIAssistant):
         """
         try:
             # Check if message indicates image upload
-            upload_keywords = ['رفع', 'صورة', 'تم', 'uploaded', 'image', 'photo']
-            message_lower = message.lower()
-
-            if any(keyword in message_lower for keyword in upload_keywords):
+            if _UPLOAD_RE.search(message):
                 return self.mark_image_uploaded("confirmed")
             else:
-                return json.dumps({
+                return _dumps({
                     "status": "info",
                     "message": "إذا كنت قد رفعت صورتك، يرجى إخباري بذلك أو استخدام زر الكاميرا 📸"
-                }, ensure_ascii=False)
+                })
 
         except Exception as e:
-            logger.error(f"Failed to process image upload confirmation: {e}")
-            return json.dumps({
+            logger.error("Failed to process image upload confirmation: %s", e)
+            return _dumps({
                 "status": "error",
                 "message": "حدث خطأ أثناء معالجة تأكيد رفع الصورة"
-            }, ensure_ascii=False)
+            })
 
     @method_tool
     def mark_image_uploaded(self, confirmation: str = "uploaded") -> str:
@@ -1171,24 +1348,26 @@ class WazenAIAssistant(SAIAAIAssistantMixin, AIAssistant):
                 return error_response
 
             # Mark image as uploaded
-            cache_entry.cached_data['image_uploaded'] = True
-            cache_entry.cached_data['image_upload_time'] = timezone.now().isoformat()
-            cache_entry.save()
+            self._update_cached_data(
+                cache_entry,
+                image_uploaded=True,
+                image_upload_time=time.time()
+            )
 
-            return json.dumps({
+            return _dumps({
                 "status": "success",
                 "company": "Wazen",
                 "message": "✅ تسلم! تم رفع الصورة الشخصية بنجاح!",
                 "next_step": "validate_data",
                 "action": "تقدر الحين تراجع وتأكد طلبك"
-            }, ensure_ascii=False)
+            })
 
         except Exception as e:
-            logger.error(f"Failed to mark image as uploaded: {e}")
-            return json.dumps({
+            logger.error("Failed to mark image as uploaded: %s", e)
+            return _dumps({
                 "status": "error",
                 "message": "حدث خطأ أثناء تأكيد رفع الصورة"
-            }, ensure_ascii=False)
+            })
 
     @method_tool
     def verify_image_upload(self) -> str:
@@ -1209,35 +1388,34 @@ class WazenAIAssistant(SAIAAIAssistantMixin, AIAssistant):
 
             if image_uploaded:
                 # Mark image verification complete
-                cache_entry.cached_data['image_verified'] = True
-                cache_entry.save()
+                self._update_cached_data(cache_entry, image_verified=True)
 
                 # Check remaining fields
-                missing_fields = cache_entry.get_missing_fields()
+                missing_fields, next_step = self._collection_status(cache_entry)
 
-                return json.dumps({
+                return _dumps({
                     "status": "success",
                     "company": "Wazen",
                     "image_status": "verified",
                     "missing_fields": missing_fields,
-                    "next_step": self._determine_next_step(missing_fields),
+                    "next_step": next_step,
                     "message": "تم التحقق من رفع الصورة الشخصية بنجاح!"
-                }, ensure_ascii=False)
+                })
             else:
-                return json.dumps({
+                return _dumps({
                     "status": "pending",
                     "company": "Wazen",
                     "image_status": "not_uploaded",
                     "message": "ما تم رفع الصورة الشخصية لسه. ارفع صورتك الشخصية أول شي.",
                     "upload_url": "/upload-image/"  # This would be the actual upload endpoint
-                }, ensure_ascii=False)
+                })
 
         except Exception as e:
-            logger.error(f"Failed to verify image upload: {e}")
-            return json.dumps({
+            logger.error("Failed to verify image upload: %s", e)
+            return _dumps({
                 "status": "error",
                 "message": "حدث خطأ أثناء التحقق من رفع الصورة"
-            }, ensure_ascii=False)
+            })
 
     @method_tool
     def collect_customer_image(self) -> str:
@@ -1257,56 +1435,50 @@ class WazenAIAssistant(SAIAAIAssistantMixin, AIAssistant):
                 return error_response
 
             # Check if all other fields are collected
-            missing_fields = cache_entry.get_missing_fields()
+            missing_fields, next_step = self._collection_status(cache_entry)
             if missing_fields:
-                return json.dumps({
+                return _dumps({
                     "status": "error",
-                    "message": f"يرجى إكمال المعلومات المطلوبة أولاً: {', '.join(missing_fields)}"
-                }, ensure_ascii=False)
+                    "message": _MSG_COMPLETE_FIELDS_FIRST % ', '.join(missing_fields)
+                })
 
             # Mark that image collection has been initiated
-            cache_entry.cached_data['image_collection_initiated'] = True
-            cache_entry.save()
+            self._update_cached_data(cache_entry, image_collection_initiated=True)
 
-            return json.dumps({
+            return _dumps({
                 "status": "upload_required",
                 "company": "Wazen",
                 "message": "ممتاز! خلاص جمعنا كل المعلومات الأساسية. الحين نحتاج صورتك الشخصية.",
-                "instructions": [
-                    "📸 ارفع صورة شخصية واضحة",
-                    "✅ تأكد إن الصورة تظهر وجهك بوضوح",
-                    "📱 تقدر تستخدم الكاميرا أو تختار صورة من الجهاز",
-                    "🔒 الصورة آمنة ومحمية وفقاً لسياسة الخصوصية"
-                ],
+                "instructions": _IMAGE_INSTRUCTIONS,
                 "upload_interface": True,
                 "session_key": cache_entry.session_key,
                 "next_action": "بعد رفع الصورة، سأتحقق منها تلقائياً",
                 "required": True,
                 "field_name": "customer_image"
-            }, ensure_ascii=False)
+            })
 
         except Exception as e:
-            logger.error(f"Failed to initiate image collection: {e}")
-            return json.dumps({
+            logger.error("Failed to initiate image collection: %s", e)
+            return _dumps({
                 "status": "error",
                 "message": "حدث خطأ أثناء تحضير رفع الصورة"
-            }, ensure_ascii=False)
+            })
 
-            return json.dumps({
+            return _dumps({
                 "status": "success",
                 "company": "Wazen",
                 "collected": {
                     "customer_image": "Image information recorded"
                 },
                 "missing_fields": missing_fields,
-                "next_step": self._determine_next_step(missing_fields),
+                "next_step": next_step,
                 "message": f"تم تسجيل معلومات الصورة. باقي {len(missing_fields)} معلومات.",
                 "note": "ارفع الصورة الفعلية من خلال الموقع."
-            }, ensure_ascii=False)
+            })
 
         except Exception as e:
-            logger.error(f"Failed to collect customer image: {e}")
-            return json.dumps({
+            logger.error("Failed to collect customer image: %s", e)
+            return _dumps({
                 "status": "error",
                 "company": "Wazen",
                 "error": str(e),
@@ -1327,156 +1499,132 @@ class WazenAIAssistant(SAIAAIAssistantMixin, AIAssistant):
             if error_response:
                 return error_response
 
-            # Check missing fields
-            missing_fields = cache_entry.get_missing_fields()
+            # Check missing fields and image state together
+            missing_fields, image_uploaded, _ = cache_entry.get_status()
 
             if missing_fields:
                 # Still have basic fields to collect
                 next_field = missing_fields[0]
-                field_names = {
-                    'customer_age': 'العمر',
-                    'customer_id': 'رقم الهوية',
-                    'customer_phone': 'رقم الهاتف'
-                }
 
-                return json.dumps({
+                return _dumps({
                     "status": "incomplete",
                     "missing_fields": missing_fields,
                     "next_step": self._determine_next_step(missing_fields),
-                    "message": f"يرجى إدخال {field_names.get(next_field, next_field)}"
-                }, ensure_ascii=False)
+                    "message": f"يرجى إدخال {_FIELD_NAMES_AR.get(next_field, next_field)}"
+                })
             else:
                 # All basic fields collected, check for image
-                image_uploaded = cache_entry.cached_data.get('image_uploaded', False)
-
                 if not image_uploaded:
-                    return json.dumps({
+                    return _dumps({
                         "status": "need_image",
                         "message": "خلاص جمعنا كل المعلومات الأساسية. الحين نحتاج صورتك الشخصية.",
                         "next_step": "collect_image",
                         "action_required": "ارفع صورتك الشخصية عشان نكمل الطلب"
-                    }, ensure_ascii=False)
+                    })
                 else:
-                    return json.dumps({
+                    return _dumps({
                         "status": "complete",
                         "message": "تسلم! خلاص جمعنا كل المعلومات المطلوبة مع الصورة الشخصية!",
                         "next_step": "validate_data"
-                    }, ensure_ascii=False)
+                    })
 
         except Exception as e:
-            logger.error(f"Failed to check collection status: {e}")
-            return json.dumps({
+            logger.error("Failed to check collection status: %s", e)
+            return _dumps({
                 "status": "error",
                 "message": "حدث خطأ أثناء فحص حالة جمع البيانات"
-            }, ensure_ascii=False)
+            })
 
     @method_tool
+    @_tool_error_handler("Failed to validate collected data", "Failed to validate collected data")
+    @_require_company
     def validate_collected_data(self) -> str:
         """Validate all collected data and present it for user confirmation."""
-        try:
-            user = getattr(self, '_user', None)
-            if not user or not user.company:
-                return json.dumps({
-                    "status": "error",
-                    "message": "User company information not available"
-                })
-
-            # Get current cache entry
-            cache_entry, error_response = self._get_cache_or_error()
-            if error_response:
-                return error_response
-
-            # Check if all required data is collected
-            missing_fields = cache_entry.get_missing_fields()
-            if missing_fields:
-                return json.dumps({
-                    "status": "error",
-                    "missing_fields": missing_fields,
-                    "message": f"Missing required information: {', '.join(missing_fields)}"
-                })
-
-            # Prepare data summary for confirmation
-            cached_data = cache_entry.cached_data
-            service_name = cached_data.get('service_name', 'Unknown Service')
+        # Get current cache entry
+        cache_entry, error_response = self._get_cache_or_error()
+        if error_response:
+            return error_response
+
+        # Check if all required data is collected
+        missing_fields = cache_entry.get_missing_fields()
+        if missing_fields:
+            return _dumps({
+                "status": "error",
+                "missing_fields": missing_fields,
+                "message": _MSG_MISSING_FIELDS % ', '.join(missing_fields)
+            })
 
-            confirmation_data = {
-                "service": {
-                    "name": service_name,
-                    "price": cached_data.get('service_price', 0)
-                },
-                "customer": {
-                    "name": cached_data.get('customer_name'),
-                    "age": cached_data.get('customer_age'),
-                    "id": cached_data.get('customer_id')
-                }
+        # Prepare data summary for confirmation
+        cached_data = cache_entry.cached_data
+        service_name = cached_data.get('service_name', 'Unknown Service')
+
+        confirmation_data = {
+            "service": {
+                "name": service_name,
+                "price": cached_data.get('service_price', 0)
+            },
+            "customer": {
+                "name": cached_data.get('customer_name'),
+                "age": cached_data.get('customer_age'),
+                "id": cached_data.get('customer_id')
             }
+        }
 
-            return json.dumps({
-                "status": "success",
-                "company": "Wazen",
-                "confirmation_data": confirmation_data,
-                "session_key": cache_entry.session_key,
-                "next_step": "confirm_order",
-                "message": "ممتاز! خلاص جمعنا كل المعلومات بنجاح. راجع طلبك وأكده."
-            }, ensure_ascii=False)
-
-        except Exception as e:
-            logger.error(f"Failed to validate collected data: {e}")
-            return json.dumps({
-                "status": "error",
-                "company": "Wazen",
-                "error": str(e),
-                "message": "Failed to validate collected data"
-            })
+        return _dumps({
+            "status": "success",
+            "company": "Wazen",
+            "confirmation_data": confirmation_data,
+            "session_key": cache_entry.session_key,
+            "next_step": "confirm_order",
+            "message": "ممتاز! خلاص جمعنا كل المعلومات بنجاح. راجع طلبك وأكده."
+        })
 
     @method_tool
+    @_tool_error_handler("Failed to confirm service order", "Failed to confirm service order")
+    @_require_company
     def confirm_service_order(self, confirmation: str) -> str:
         """Confirm and submit the service order after user validation.""" 
-        try:
-            user = getattr(self, '_user', None)
-            if not user or not user.company:
-                return json.dumps({
-                    "status": "error",
-                    "message": "User company information not available"
-                })
-
-            # Check if user confirmed (yes, confirm, etc.)
-            confirmation_lower = confirmation.lower().strip()
-            confirmation_keywords = ['yes', 'نعم', 'confirm', 'أكد', 'موافق', 'ok', 'تأكيد', 'تاكيد']
-            if confirmation_lower not in confirmation_keywords:
-                return json.dumps({
-                    "status": "cancelled",
-                    "message": "Order cancelled. Say 'yes' or 'تأكيد' to confirm your order."
-                })
+        user = self._user
+
+        # Check if user confirmed (yes, confirm, etc.)
+        confirmation_lower = confirmation.lower().strip()
+        if confirmation_lower not in _CONFIRM_KEYWORDS:
+            return _dumps({
+                "status": "cancelled",
+                "message": "Order cancelled. Say 'yes' or 'تأكيد' to confirm your order."
+            })
 
-            # Get current cache entry
-            cache_entry, error_response = self._get_cache_or_error()
-            if error_response:
-                return error_response
+        # Get current cache entry
+        cache_entry, error_response = self._get_cache_or_error()
+        if error_response:
+            return error_response
 
-            # Get cached data first
-            cached_data = cache_entry.cached_data
+        # Get cached data first
+        cached_data = cache_entry.cached_data
+        missing_fields, image_uploaded, image_verified = cache_entry.get_status()
 
-            # Validate all data is complete
-            if not cache_entry.is_complete:
-                missing_fields = cache_entry.get_missing_fields()
-                return json.dumps({
-                    "status": "error",
-                    "missing_fields": missing_fields,
-                    "message": f"Cannot confirm order. Missing: {', '.join(missing_fields)}"
-                })
+        # Validate all data is complete
+        if missing_fields:
+            return _dumps({
+                "status": "error",
+                "missing_fields": missing_fields,
+                "message": _MSG_CANNOT_CONFIRM % ', '.join(missing_fields)
+            })
 
-            # Verify image upload before creating order
-            if not cached_data.get('image_verified') and not cached_data.get('image_uploaded'):
-                return json.dumps({
-                    "status": "error",
-                    "message": "ما أقدر أأكد الطلب. ارفع الصورة الشخصية أول شي.",
-                    "required_action": "upload_image"
-                }, ensure_ascii=False)
+        # Verify image upload before creating order
+        if not image_verified and not image_uploaded:
+            return _dumps({
+                "status": "error",
+                "message": "ما أقدر أأكد الطلب. ارفع الصورة الشخصية أول شي.",
+                "required_action": "upload_image"
+            })
 
-            # Create the service order
+        # Create the service order and drop its cache entry together, so a
+        # failure never leaves an order behind with a still-active session
+        now = _now()
+        with transaction.atomic():
             service_order = ServiceOrder.objects.create(
-                company=user.company,
+                company_id=user.company_id,
                 created_by=user,
                 service=cache_entry.service,
                 customer_name=cached_data['customer_name'],
@@ -1484,106 +1632,111 @@ class WazenAIAssistant(SAIAAIAssistantMixin, AIAssistant):
                 customer_id=cached_data['customer_id'],
                 customer_phone=cached_data['customer_phone'],
                 status='under_review',
-                confirmed_at=timezone.now(),
+                confirmed_at=now,
                 ai_session_data={
                     'session_key': cache_entry.session_key,
-                    'confirmation_time': timezone.now().isoformat(),
+                    'confirmation_time': now.isoformat(),
                     'user_agent': 'AI Assistant',
-                    'image_uploaded': cached_data.get('image_uploaded', False)
+                    'image_uploaded': image_uploaded
                 }
             )
 
             # Clean up cache entry
             cache_entry.delete()
 
-            return json.dumps({
-                "status": "success",
-                "company": "Wazen",
-                "order": {
-                    "order_number": service_order.order_number,
-                    "service_name": service_order.service.name,
-                    "customer_name": service_order.customer_name,
-                    "status": service_order.status,
-                    "created_at": service_order.created_at.isoformat()
-                },
-                "message": f"تم إرسال الطلب رقم {service_order.order_number} بنجاح! طلبك الحين قيد المراجعة."
-            }, ensure_ascii=False)
+        self._active_cache_entry = None
 
-        except Exception as e:
-            logger.error(f"Failed to confirm service order: {e}")
-            return json.dumps({
-                "status": "error",
-                "company": "Wazen",
-                "error": str(e),
-                "message": "Failed to confirm service order"
-            })
+        return _dumps({
+            "status": "success",
+            "company": "Wazen",
+            "order": {
+                "order_number": service_order.order_number,
+                "service_name": service_order.service.name,
+                "customer_name": service_order.customer_name,
+                "status": service_order.status,
+                "created_at": service_order.created_at
+            },
+            "message": _MSG_ORDER_CONFIRMED % service_order.order_number
+        })
+
+    def _get_recent_orders(self, user):
+        """Get the user's five most recent orders as response dicts."""
+        # Only the listed columns are fetched, as plain dicts
+        orders = ServiceOrder.objects.filter(
+            created_by=user,
+            company_id=user.company_id
+        ).order_by('-created_at').values(
+            'id', 'service__name', 'customer_name', 'status', 'created_at'
+        )[:5]
+
+        return [
+            {
+                "order_number": ServiceOrder.format_order_number(order['id']),
+                "service_name": order['service__name'],
+                "customer_name": order['customer_name'],
+                "status": order['status'],
+                "created_at": order['created_at']
+            }
+            for order in orders
+        ]
 
     @method_tool
+    @_tool_error_handler("Failed to get order status", "Failed to get order status")
+    @_require_company
     def get_order_status(self, order_number: str = None) -> str:
         """Get status of service orders."""
-        try:
-            user = getattr(self, '_user', None)
-            if not user or not user.company:
-                return json.dumps({
+        user = self._user
+
+        if order_number:
+            # Get specific order. order_number is a property, not a column, so
+            # match the UUID prefix it is built from instead
+            match = _ORDER_NUMBER_RE.fullmatch(order_number.strip())
+            orders = []
+            if match:
+                orders = list(ServiceOrder.objects.select_related('service').only(
+                    'id', 'service__name', 'customer_name', 'status', 'created_at', 'updated_at'
+                ).filter(
+                    id__istartswith=match.group(1).lower(),
+                    company_id=user.company_id
+                )[:2])
+            if len(orders) > 1:
+                # Two orders share the 8-digit prefix; never guess which one is meant
+                logger.warning("Order number %s matches more than one order", order_number)
+                return _dumps({
                     "status": "error",
-                    "message": "User company information not available"
+                    "message": _MSG_ORDER_AMBIGUOUS % order_number
                 })
-
-            if order_number:
-                # Get specific order
-                try:
-                    order = ServiceOrder.objects.get(
-                        order_number=order_number,
-                        company=user.company
-                    )
-                    return json.dumps({
-                        "status": "success",
-                        "company": "Wazen",
-                        "order": {
-                            "order_number": order.order_number,
-                            "service_name": order.service.name,
-                            "customer_name": order.customer_name,
-                            "status": order.status,
-                            "created_at": order.created_at.isoformat(),
-                            "updated_at": order.updated_at.isoformat()
-                        },
-                        "message": f"Order {order_number} found"
-                    }, ensure_ascii=False)
-                except ServiceOrder.DoesNotExist:
-                    return json.dumps({
-                        "status": "error",
-                        "message": f"Order {order_number} not found"
-                    })
-            else:
-                # Get recent orders for this user
-                orders = ServiceOrder.objects.filter(
-                    created_by=user,
-                    company=user.company
-                ).order_by('-created_at')[:5]
-
-                orders_data = []
-                for order in orders:
-                    orders_data.append({
+            if orders:
+                order = orders[0]
+                return _dumps({
+                    "status": "success",
+                    "company": "Wazen",
+                    "order": {
                         "order_number": order.order_number,
                         "service_name": order.service.name,
                         "customer_name": order.customer_name,
                         "status": order.status,
-                        "created_at": order.created_at.isoformat()
-                    })
-
-                return json.dumps({
-                    "status": "success",
-                    "company": "Wazen",
-                    "orders": orders_data,
-                    "count": len(orders_data),
-                    "message": f"Found {len(orders_data)} recent orders"
-                }, ensure_ascii=False)
-
-        except Exception as e:
-            logger.error(f"Failed to get order status: {e}")
-            return json.dumps({
+                        "created_at": order.created_at,
+                        "updated_at": order.updated_at
+                    },
+                    "message": _MSG_ORDER_FOUND % order_number
+                })
+            return _dumps({
                 "status": "error",
+                "message": _MSG_ORDER_NOT_FOUND % order_number
+            })
+        else:
+            # Get recent orders for this user
+            cache_key = recent_orders_cache_key(user.company_id, user.id)
+            orders_data = cache.get(cache_key)
+            if orders_data is None:
+                orders_data = self._get_recent_orders(user)
+                cache.set(cache_key, orders_data, timeout=RECENT_ORDERS_CACHE_TIMEOUT)
+
+            return _dumps({
+                "status": "success",
                 "company": "Wazen",
-                "error": str(e),
-                "message": "Failed to get order status"
+                "orders": orders_data,
+                "count": len(orders_data),
+                "message": f"Found {len(orders_data)} recent orders"
             })
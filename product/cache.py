@@ -0,0 +1,96 @@
+"""
+Cache keys and invalidation helpers for product data.
+
+The AI assistants cache service listings, company information and recent
+order lists built from the product models. The keys live here so model
+signals and management commands can invalidate them without importing
+the assistants.
+"""
+
+import logging
+
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+
+# Service listings rarely change; product signals invalidate them on writes
+SERVICES_CACHE_TIMEOUT = 120
+
+# Company info articles rarely change; knowledge signals invalidate them on writes
+COMPANY_INFO_CACHE_TIMEOUT = 600
+
+# Recent orders only change on order writes; order signals invalidate them
+RECENT_ORDERS_CACHE_TIMEOUT = 60
+
+# Client database counts have no models to hook signals on, so they simply expire
+OVERVIEW_COUNTS_CACHE_TIMEOUT = 60
+
+# The Wazen company id only changes if its company row is recreated
+WAZEN_COMPANY_ID_CACHE_TIMEOUT = 3600
+
+
+def wazen_company_id_cache_key():
+    return 'wazen_company_id'
+
+
+def orderable_services_cache_key(company_id):
+    return f'wazen_orderable_services_{company_id}'
+
+
+def services_text_cache_key(company_id):
+    return f'wazen_services_text_{company_id}'
+
+
+def service_names_cache_key(company_id):
+    return f'wazen_service_names_{company_id}'
+
+
+def company_info_cache_key(company_id):
+    return f'wazen_company_info_{company_id}'
+
+
+def recent_orders_cache_key(company_id, user_id):
+    return f'wazen_recent_orders_{company_id}_{user_id}'
+
+
+def overview_counts_cache_key(company_id):
+    return f'wazen_overview_counts_{company_id}'
+
+
+def invalidate_services_cache(company_id):
+    """
+    Invalidate the cached orderable services for a company.
+    Called from product signals when services are added/updated/deleted.
+    """
+    try:
+        cache.delete_many([
+            orderable_services_cache_key(company_id),
+            services_text_cache_key(company_id),
+            service_names_cache_key(company_id),
+        ])
+        logger.debug("Invalidated orderable services cache for company %s", company_id)
+    except Exception as e:
+        logger.warning("Failed to invalidate services cache: %s", e)
+
+
+def invalidate_company_info_cache(company_id):
+    """
+    Invalidate the cached company information for a company.
+    Called from knowledge signals when articles are added/updated/deleted.
+    """
+    try:
+        cache.delete(company_info_cache_key(company_id))
+    except Exception as e:
+        logger.warning("Failed to invalidate company info cache: %s", e)
+
+
+def invalidate_recent_orders_cache(company_id, user_id):
+    """
+    Invalidate the cached recent orders list of a user.
+    Called from order signals when orders are created/updated/deleted.
+    """
+    try:
+        cache.delete(recent_orders_cache_key(company_id, user_id))
+    except Exception as e:
+        logger.warning("Failed to invalidate recent orders cache: %s", e)
@@ -2,99 +2,51 @@
 Management command to import Wazen content following the guide recommendations
 """
 from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Q
 from django.utils.text import slugify
+from product.cache import invalidate_company_info_cache
 from product.models import KnowledgeCategory, KnowledgeArticle, FAQ
 from company.models import Company
 
 
-class Command(BaseCommand):
-    help = 'Import Wazen content into the enhanced knowledge base structure'
-
-    def add_arguments(self, parser):
-        parser.add_argument(
-            '--company-id',
-            type=int,
-            required=True,
-            help='Company ID to import content for'
-        )
-        parser.add_argument(
-            '--dry-run',
-            action='store_true',
-            help='Show what would be imported without actually importing'
-        )
-
-    def handle(self, *args, **options):
-        company_id = options['company_id']
-        dry_run = options['dry_run']
-        
-        try:
-            company = Company.objects.get(id=company_id)
-        except Company.DoesNotExist:
-            self.stdout.write(
-                self.style.ERROR(f'Company with ID {company_id} does not exist')
-            )
-            return
+# Knowledge base categories
+_CATEGORIES = (
+    {
+        'name': 'عروض التأمين',
+        'description': 'معلومات حول عروض التأمين المختلفة',
+        'slug': 'insurance-offerings'
+    },
+    {
+        'name': 'عن وازن',
+        'description': 'معلومات عن الشركة ورؤيتها',
+        'slug': 'about-wazen'
+    },
+    {
+        'name': 'السياسات والشروط',
+        'description': 'السياسات القانونية والشروط والأحكام',
+        'slug': 'policies-terms'
+    },
+    {
+        'name': 'الخصوصية',
+        'description': 'سياسة الخصوصية وحماية البيانات',
+        'slug': 'privacy'
+    },
+    {
+        'name': 'الأسئلة الشائعة',
+        'description': 'الأسئلة المتكررة وإجاباتها',
+        'slug': 'faqs'
+    }
+)
 
-        self.stdout.write(f'Importing content for: {company.name}')
-        
-        if dry_run:
-            self.stdout.write(self.style.WARNING('DRY RUN MODE - No data will be saved'))
-
-        # Create categories
-        categories_data = [
-            {
-                'name': 'عروض التأمين',
-                'description': 'معلومات حول عروض التأمين المختلفة',
-                'slug': 'insurance-offerings'
-            },
-            {
-                'name': 'عن وازن',
-                'description': 'معلومات عن الشركة ورؤيتها',
-                'slug': 'about-wazen'
-            },
-            {
-                'name': 'السياسات والشروط',
-                'description': 'السياسات القانونية والشروط والأحكام',
-                'slug': 'policies-terms'
-            },
-            {
-                'name': 'الخصوصية',
-                'description': 'سياسة الخصوصية وحماية البيانات',
-                'slug': 'privacy'
-            },
-            {
-                'name': 'الأسئلة الشائعة',
-                'description': 'الأسئلة المتكررة وإجاباتها',
-                'slug': 'faqs'
-            }
-        ]
-
-        categories = {}
-        for cat_data in categories_data:
-            if not dry_run:
-                category, created = KnowledgeCategory.objects.get_or_create(
-                    company=company,
-                    name=cat_data['name'],
-                    defaults={
-                        'description': cat_data['description'],
-                        'display_order': len(categories) + 1
-                    }
-                )
-                categories[cat_data['slug']] = category
-                status = 'Created' if created else 'Exists'
-            else:
-                status = 'Would create'
-            
-            self.stdout.write(f'  {status}: {cat_data["name"]}')
-
-        # Insurance offerings articles
-        insurance_articles = [
-            {
-                'title': 'تأمين المركبات ضد الغير – التأمين الإلزامي',
-                'slug': 'vehicles-insurance-third-party',
-                'category': 'insurance-offerings',
-                'article_type': 'service',
-                'content_md': '''## ما يشمله التأمين
+# Insurance offerings articles
+_ARTICLES = (
+    {
+        'title': 'تأمين المركبات ضد الغير – التأمين الإلزامي',
+        'slug': 'vehicles-insurance-third-party',
+        'category': 'insurance-offerings',
+        'article_type': 'service',
+        'content_md': '''## ما يشمله التأمين
 
 - تغطية مسؤوليتك القانونية تجاه الأضرار الجسدية أو المادية للطرف الثالث
 - الحماية من المطالبات المالية الناتجة عن الحوادث المرورية
@@ -114,15 +66,15 @@ class Command(BaseCommand):
 - صورة من استمارة المركبة (الملكية)
 - صورة من الهوية الوطنية أو الإقامة
 - شهادة الفحص الدوري للمركبة (إن وجدت)''',
-                'keywords': 'تأمين ضد الغير، التأمين الإلزامي، مركبات، حوادث، مسؤولية مدنية',
-                'tags': ['مركبات', 'تأمين إلزامي', 'ضد الغير', 'حوادث']
-            },
-            {
-                'title': 'التأمين الشامل – حماية مركبتك والطرف الثالث',
-                'slug': 'vehicles-insurance-comprehensive',
-                'category': 'insurance-offerings',
-                'article_type': 'service',
-                'content_md': '''## ما يشمله التأمين
+        'keywords': 'تأمين ضد الغير، التأمين الإلزامي، مركبات، حوادث، مسؤولية مدنية',
+        'tags': ['مركبات', 'تأمين إلزامي', 'ضد الغير', 'حوادث']
+    },
+    {
+        'title': 'التأمين الشامل – حماية مركبتك والطرف الثالث',
+        'slug': 'vehicles-insurance-comprehensive',
+        'category': 'insurance-offerings',
+        'article_type': 'service',
+        'content_md': '''## ما يشمله التأمين
 
 - **أضرار مركبتك**: تغطية شاملة لأضرار مركبتك نتيجة الحوادث والحرائق والسرقة والكوارث الطبيعية
 - **مسؤوليتك تجاه الغير**: تغطية كاملة للأضرار التي قد تلحق بالطرف الثالث
@@ -142,49 +94,16 @@ class Command(BaseCommand):
 - **تأمين الزجاج**: تغطية خاصة لزجاج المركبة
 - **المساعدة على الطريق**: خدمة الطوارئ والمساعدة الفنية
 - **السائق الشخصي**: تغطية إضافية للسائق الشخصي''',
-                'keywords': 'التأمين الشامل، مركبات، حماية شاملة، حوادث، سرقة، حريق',
-                'tags': ['مركبات', 'تأمين شامل', 'حماية كاملة', 'تغطيات اختيارية']
-            }
-        ]
+        'keywords': 'التأمين الشامل، مركبات، حماية شاملة، حوادث، سرقة، حريق',
+        'tags': ['مركبات', 'تأمين شامل', 'حماية كاملة', 'تغطيات اختيارية']
+    }
+)
 
-        # Import articles
-        for article_data in insurance_articles:
-            if not dry_run:
-                category = categories[article_data['category']]
-                article, created = KnowledgeArticle.objects.get_or_create(
-                    company=company,
-                    title=article_data['title'],
-                    defaults={
-                        'category': category,
-                        'slug': article_data['slug'],
-                        'content_md': article_data['content_md'],
-                        'content': article_data['content_md'],  # Fallback
-                        'article_type': article_data['article_type'],
-                        'keywords': article_data['keywords'],
-                        'tags': article_data['tags'],
-                        'locale': 'ar',
-                        'published': True,
-                        'is_active': True
-                    }
-                )
-                status = 'Created' if created else 'Updated'
-                if not created:
-                    # Update existing article
-                    article.content_md = article_data['content_md']
-                    article.content = article_data['content_md']
-                    article.keywords = article_data['keywords']
-                    article.tags = article_data['tags']
-                    article.save()
-            else:
-                status = 'Would create'
-            
-            self.stdout.write(f'  {status}: {article_data["title"][:50]}...')
-
-        # Sample FAQs
-        faqs_data = [
-            {
-                'question': 'ما الفرق بين تأمين ضد الغير والتأمين الشامل؟',
-                'answer_md': '''تأمين ضد الغير يغطي مسؤوليتك تجاه الغير فقط ولا يغطي أضرار مركبتك.
+# Sample FAQs
+_FAQS = (
+    {
+        'question': 'ما الفرق بين تأمين ضد الغير والتأمين الشامل؟',
+        'answer_md': '''تأمين ضد الغير يغطي مسؤوليتك تجاه الغير فقط ولا يغطي أضرار مركبتك.
 
 **التأمين الشامل** يغطي:
 - أضرار مركبتك **بالإضافة** إلى مسؤوليتك تجاه الغير
@@ -192,11 +111,11 @@ class Command(BaseCommand):
 - إمكانية إضافة تغطيات اختيارية
 
 **الخلاصة**: التأمين الشامل يوفر حماية أكبر ولكن بتكلفة أعلى.''',
-                'tags': ['مركبات', 'تغطية', 'سعر', 'مقارنة']
-            },
-            {
-                'question': 'كيف أحصل على عرض سعر للتأمين؟',
-                'answer_md': '''يمكنك الحصول على عرض سعر بسهولة من خلال:
+        'tags': ['مركبات', 'تغطية', 'سعر', 'مقارنة']
+    },
+    {
+        'question': 'كيف أحصل على عرض سعر للتأمين؟',
+        'answer_md': '''يمكنك الحصول على عرض سعر بسهولة من خلال:
 
 1. **الموقع الإلكتروني**: ادخل بيانات مركبتك واحصل على عرض فوري
 2. **التطبيق**: حمل تطبيق وازن واحصل على عروض متعددة
@@ -206,34 +125,176 @@ class Command(BaseCommand):
 - رخصة القيادة
 - استمارة المركبة
 - الهوية الوطنية''',
-                'tags': ['عرض سعر', 'شراء', 'مستندات', 'خدمة عملاء']
-            }
+        'tags': ['عرض سعر', 'شراء', 'مستندات', 'خدمة عملاء']
+    }
+)
+
+
+class Command(BaseCommand):
+    help = 'Import Wazen content into the enhanced knowledge base structure'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--company-id',
+            type=int,
+            required=True,
+            help='Company ID to import content for'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Show what would be imported without actually importing'
+        )
+
+    def handle(self, *args, **options):
+        company_id = options['company_id']
+        dry_run = options['dry_run']
+        
+        try:
+            company = Company.objects.get(id=company_id)
+        except Company.DoesNotExist:
+            self.stdout.write(
+                self.style.ERROR(f'Company with ID {company_id} does not exist')
+            )
+            return
+
+        self.stdout.write(f'Importing content for: {company.name}')
+        
+        if dry_run:
+            self.stdout.write(self.style.WARNING('DRY RUN MODE - No data will be saved'))
+
+        self._import_content(company, dry_run)
+
+        self.stdout.write(
+            self.style.SUCCESS(f'✅ Content import completed for {company.name}')
+        )
+
+    @transaction.atomic
+    def _import_content(self, company, dry_run):
+        """Import categories, articles and FAQs with a few bulk queries per model"""
+        if dry_run:
+            self.stdout.write('\n'.join(
+                [f'  Would create: {cat_data["name"]}' for cat_data in _CATEGORIES]
+                + [f'  Would create: {article_data["title"][:50]}...' for article_data in _ARTICLES]
+                + [f'  Would create: {faq_data["question"][:50]}...' for faq_data in _FAQS]
+            ))
+            return
+
+        # Create missing categories; existing ones are left untouched
+        categories_by_name = {
+            category.name: category
+            for category in KnowledgeCategory.objects.filter(
+                company=company,
+                name__in=[cat_data['name'] for cat_data in _CATEGORIES]
+            )
+        }
+        new_categories = [
+            KnowledgeCategory(
+                company=company,
+                name=cat_data['name'],
+                description=cat_data['description'],
+                display_order=display_order
+            )
+            for display_order, cat_data in enumerate(_CATEGORIES, 1)
+            if cat_data['name'] not in categories_by_name
+        ]
+        lines = [
+            f'  {"Exists" if cat_data["name"] in categories_by_name else "Created"}: {cat_data["name"]}'
+            for cat_data in _CATEGORIES
         ]
+        for category in KnowledgeCategory.objects.bulk_create(new_categories, batch_size=500):
+            categories_by_name[category.name] = category
+        self.stdout.write('\n'.join(lines))
+
+        categories = {
+            cat_data['slug']: categories_by_name[cat_data['name']]
+            for cat_data in _CATEGORIES
+        }
 
-        # Import FAQs
-        for faq_data in faqs_data:
-            if not dry_run:
-                faq, created = FAQ.objects.get_or_create(
+        # Import articles, updating the content of existing ones
+        titles = [article_data['title'] for article_data in _ARTICLES]
+        existing_articles = list(KnowledgeArticle.objects.filter(
+            Q(title__in=titles) | Q(slug__in=[article_data['slug'] for article_data in _ARTICLES]),
+            company=company
+        ).values_list('title', 'slug'))
+        existing_titles = {title for title, _slug in existing_articles if title in titles}
+        taken_slugs = {slug for _title, slug in existing_articles}
+
+        # Existing titles keep their slug (the upsert does not touch it). A new
+        # title whose slug another article already uses gets a numbered slug,
+        # as KnowledgeArticle.save() does, since ON CONFLICT only covers titles
+        slugs = {}
+        for article_data in _ARTICLES:
+            slug = article_data['slug']
+            if article_data['title'] not in existing_titles and slug in taken_slugs:
+                numbered_slugs = set(KnowledgeArticle.objects.filter(
                     company=company,
-                    question=faq_data['question'],
-                    defaults={
-                        'answer_md': faq_data['answer_md'],
-                        'tags': faq_data['tags'],
-                        'locale': 'ar',
-                        'published': True,
-                        'is_active': True
-                    }
+                    slug__startswith=f'{slug}-'
+                ).values_list('slug', flat=True))
+                counter = 1
+                while f'{slug}-{counter}' in numbered_slugs:
+                    counter += 1
+                slug = f'{slug}-{counter}'
+            slugs[article_data['title']] = slug
+        KnowledgeArticle.objects.bulk_create(
+            [
+                KnowledgeArticle(
+                    company=company,
+                    title=article_data['title'],
+                    category=categories[article_data['category']],
+                    slug=slugs[article_data['title']],
+                    content_md=article_data['content_md'],
+                    content=article_data['content_md'],  # Fallback
+                    article_type=article_data['article_type'],
+                    keywords=article_data['keywords'],
+                    tags=article_data['tags'],
+                    locale='ar',
+                    published=True,
+                    is_active=True
                 )
-                status = 'Created' if created else 'Updated'
-                if not created:
-                    faq.answer_md = faq_data['answer_md']
-                    faq.tags = faq_data['tags']
-                    faq.save()
-            else:
-                status = 'Would create'
-            
-            self.stdout.write(f'  {status}: {faq_data["question"][:50]}...')
+                for article_data in _ARTICLES
+            ],
+            update_conflicts=True,
+            unique_fields=['company', 'title'],
+            # Same fields the per-row save() refreshed, including the auto_now ones
+            update_fields=['content_md', 'content', 'keywords', 'tags', 'last_reviewed_at', 'updated_at'],
+            batch_size=500
+        )
+        # Bulk writes skip the post_save signal that drops cached company info
+        transaction.on_commit(lambda: invalidate_company_info_cache(company.id))
 
-        self.stdout.write(
-            self.style.SUCCESS(f'✅ Content import completed for {company.name}')
+        self.stdout.write('\n'.join(
+            f'  {"Updated" if article_data["title"] in existing_titles else "Created"}: '
+            f'{article_data["title"][:50]}...'
+            for article_data in _ARTICLES
+        ))
+
+        # Import FAQs, updating the answers of existing ones
+        existing_questions = set(FAQ.objects.filter(
+            company=company,
+            question__in=[faq_data['question'] for faq_data in _FAQS]
+        ).values_list('question', flat=True))
+        FAQ.objects.bulk_create(
+            [
+                FAQ(
+                    company=company,
+                    question=faq_data['question'],
+                    answer_md=faq_data['answer_md'],
+                    tags=faq_data['tags'],
+                    locale='ar',
+                    published=True,
+                    is_active=True
+                )
+                for faq_data in _FAQS
+            ],
+            update_conflicts=True,
+            unique_fields=['company', 'question'],
+            update_fields=['answer_md', 'tags', 'last_reviewed_at', 'updated_at'],
+            batch_size=500
         )
+
+        self.stdout.write('\n'.join(
+            f'  {"Updated" if faq_data["question"] in existing_questions else "Created"}: '
+            f'{faq_data["question"][:50]}...'
+            for faq_data in _FAQS
+        ))
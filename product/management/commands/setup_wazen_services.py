@@ -4,29 +4,20 @@ Wazen offers exactly 2 vehicle insurance services as defined in their business d
 """
 
 from django.core.management.base import BaseCommand
+from django.db import transaction
 from django.utils import timezone
 from company.models import Company
+from product.cache import invalidate_services_cache
 from product.models import Product
 
 
-class Command(BaseCommand):
-    help = 'Set up correct Wazen services based on wazen-data.md specifications'
-
-    def handle(self, *args, **options):
-        self.stdout.write(self.style.SUCCESS('Setting up correct Wazen services from wazen-data.md...'))
-
-        try:
-            # Get Wazen company
-            wazen_company = Company.objects.get(name='Wazen')
-            self.stdout.write(f'Found Wazen company: {wazen_company.name}')
-
-            # Create correct services based on wazen-data.md
-            # Wazen offers exactly 2 vehicle insurance services
-            services_data = [
-                {
-                    'name': 'تأمين المركبات ضد الغير',
-                    'price': 500.00,
-                    'service_description': '''التأمين الإلزامي للمركبات - الحد الأدنى من التغطية المطلوبة قانونياً.
+# Correct services based on wazen-data.md
+# Wazen offers exactly 2 vehicle insurance services
+_SERVICES = (
+    {
+        'name': 'تأمين المركبات ضد الغير',
+        'price': 500.00,
+        'service_description': '''التأمين الإلزامي للمركبات - الحد الأدنى من التغطية المطلوبة قانونياً.
 
 ما يشمله التأمين:
 • تغطية مسؤوليتك القانونية تجاه الأضرار الجسدية أو المادية التي قد تسببها لطرف ثالث (أفراد أو ممتلكات)
@@ -37,13 +28,13 @@ class Command(BaseCommand):
 • متطلب نظامي من قبل الجهات المعنية يقدم الحد الأدنى من التغطية المطلوبة
 
 ملاحظة: هذا التأمين لا يغطي أضرار مركبتك أو إصابتك الشخصية.''',
-                    'is_service_orderable': True,
-                    'requires_customer_info': True
-                },
-                {
-                    'name': 'التأمين الشامل',
-                    'price': 1500.00,
-                    'service_description': '''الحماية الكاملة لمركبتك وللطرف الثالث - التغطية الأشمل والأكثر حماية.
+        'is_service_orderable': True,
+        'requires_customer_info': True
+    },
+    {
+        'name': 'التأمين الشامل',
+        'price': 1500.00,
+        'service_description': '''الحماية الكاملة لمركبتك وللطرف الثالث - التغطية الأشمل والأكثر حماية.
 
 ما يشمله التأمين:
 • تغطية أضرار مركبتك الناتجة عن الحوادث، والحرائق، والسرقة، والكوارث الطبيعية (مثل الفيضانات أو العواصف)
@@ -54,33 +45,53 @@ class Command(BaseCommand):
 • حماية شاملة لمركبتك واستثمارك من معظم المخاطر
 • مرن مع إمكانية إضافة تغطيات اختيارية تناسب احتياجاتك الخاصة
 • مثالي للأشخاص الذين يرغبون في تغطية أضرار مركباتهم وحمايتهم من المسؤولية تجاه الغير وللمركبات الجديدة أو ذات القيمة العالية''',
-                    'is_service_orderable': True,
-                    'requires_customer_info': True
-                }
-            ]
+        'is_service_orderable': True,
+        'requires_customer_info': True
+    }
+)
 
-            created_count = 0
-            updated_count = 0
 
-            for service_data in services_data:
-                service, created = Product.objects.get_or_create(
-                    name=service_data['name'],
+class Command(BaseCommand):
+    help = 'Set up correct Wazen services based on wazen-data.md specifications'
+
+    def handle(self, *args, **options):
+        self.stdout.write(self.style.SUCCESS('Setting up correct Wazen services from wazen-data.md...'))
+
+        try:
+            # Get Wazen company
+            wazen_company = Company.objects.get(name='Wazen')
+            self.stdout.write(f'Found Wazen company: {wazen_company.name}')
+
+            # One SELECT for the services that already exist
+            existing = {
+                service.name: service
+                for service in Product.objects.filter(
                     company=wazen_company,
-                    defaults={
-                        'price': service_data['price'],
-                        'type': 'service',
-                        'quantity': 999,  # Services don't have quantity limits
-                        'expiration': timezone.now().date().replace(year=2025),
-                        'service_description': service_data['service_description'],
-                        'is_service_orderable': service_data['is_service_orderable'],
-                        'requires_customer_info': service_data['requires_customer_info']
-                    }
+                    name__in=[service_data['name'] for service_data in _SERVICES]
                 )
-
-                if created:
-                    created_count += 1
-                    self.stdout.write(
-                        self.style.SUCCESS(f'✅ Created service: {service.name}')
+            }
+
+            to_create = []
+            to_update = []
+            lines = []
+            now = timezone.now()
+            default_expiration = now.date().replace(year=2025)
+            for service_data in _SERVICES:
+                service = existing.get(service_data['name'])
+                if service is None:
+                    to_create.append(Product(
+                        name=service_data['name'],
+                        company=wazen_company,
+                        price=service_data['price'],
+                        type='service',
+                        quantity=999,  # Services don't have quantity limits
+                        expiration=default_expiration,
+                        service_description=service_data['service_description'],
+                        is_service_orderable=service_data['is_service_orderable'],
+                        requires_customer_info=service_data['requires_customer_info']
+                    ))
+                    lines.append(
+                        self.style.SUCCESS(f'✅ Created service: {service_data["name"]}')
                     )
                 else:
                     # Update existing service
@@ -89,12 +100,31 @@ class Command(BaseCommand):
                     service.service_description = service_data['service_description']
                     service.is_service_orderable = service_data['is_service_orderable']
                     service.requires_customer_info = service_data['requires_customer_info']
-                    service.save()
-                    updated_count += 1
-                    self.stdout.write(
+                    service.updated_at = now
+                    to_update.append(service)
+                    lines.append(
                         self.style.WARNING(f'⚠️  Updated existing service: {service.name}')
                     )
 
+            # One transaction for the whole batch instead of a commit per row
+            with transaction.atomic():
+                Product.objects.bulk_create(to_create, batch_size=500)
+                Product.objects.bulk_update(
+                    to_update,
+                    fields=[
+                        'price', 'type', 'service_description',
+                        'is_service_orderable', 'requires_customer_info', 'updated_at'
+                    ],
+                    batch_size=500
+                )
+                # Bulk writes skip the Product signals that drop cached service listings
+                transaction.on_commit(lambda: invalidate_services_cache(wazen_company.id))
+
+            self.stdout.write('\n'.join(lines))
+
+            created_count = len(to_create)
+            updated_count = len(to_update)
+
             self.stdout.write(
                 self.style.SUCCESS(
                     f'\n🎉 Setup complete! Created {created_count} new services, updated {updated_count} existing services.'
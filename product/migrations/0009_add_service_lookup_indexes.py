@@ -0,0 +1,25 @@
+# Generated manually for service lookup indexes
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('product', '0008_add_customer_phone'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['company', 'type', 'is_service_orderable'], name='product_pro_company_02de97_idx'),
+        ),
+        migrations.RemoveIndex(
+            model_name='serviceordercache',
+            name='product_ser_user_id_ce5289_idx',
+        ),
+        migrations.AddIndex(
+            model_name='serviceordercache',
+            index=models.Index(fields=['user', 'company', 'expires_at'], name='product_ser_user_id_ebcfc9_idx'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated manually for product name lookups
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('product', '0009_add_service_lookup_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['company', 'name'], name='product_pro_company_249d3f_idx'),
+        ),
+    ]
@@ -57,6 +57,10 @@ class Product(models.Model):
         verbose_name = "Product"
         verbose_name_plural = "Products"
         ordering = ("created_at",)
+        indexes = [
+            models.Index(fields=['company', 'type', 'is_service_orderable']),
+            models.Index(fields=['company', 'name']),
+        ]
 
     def __str__(self):
         return self.name
@@ -483,7 +487,12 @@ class ServiceOrder(models.Model):
     @property
     def order_number(self):
         """Generate a human-readable order number"""
-        return f"WZ-{self.id.hex[:8].upper()}"
+        return self.format_order_number(self.id)
+
+    @staticmethod
+    def format_order_number(order_id):
+        """Build the human-readable order number for an order id"""
+        return f"WZ-{order_id.hex[:8].upper()}"
 
 
 class ServiceOrderCache(models.Model):
@@ -546,13 +555,16 @@ class ServiceOrderCache(models.Model):
         help_text=_("When this cache entry expires")
     )
 
+    # Customer fields that must be cached before an order can be confirmed
+    REQUIRED_FIELDS = ('customer_name', 'customer_age', 'customer_id', 'customer_phone')
+
     class Meta:
         verbose_name = _("Service Order Cache")
         verbose_name_plural = _("Service Order Cache")
         ordering = ['-created_at']
         indexes = [
             models.Index(fields=['session_key']),
-            models.Index(fields=['user', 'company']),
+            models.Index(fields=['user', 'company', 'expires_at']),
             models.Index(fields=['expires_at']),
         ]
 
@@ -567,16 +579,17 @@ class ServiceOrderCache(models.Model):
 
     def get_missing_fields(self):
         """Get list of missing required fields"""
-        required_fields = ['customer_name', 'customer_age', 'customer_id', 'customer_phone']
-        missing = []
-
-        for field in required_fields:
-            if not self.cached_data.get(field):
-                missing.append(field)
+        cached_data = self.cached_data
+        return [field for field in self.REQUIRED_FIELDS if not cached_data.get(field)]
 
-        return missing
+    def get_status(self):
+        """Get missing required fields and the image upload flags in one pass"""
+        cached_data = self.cached_data
+        missing = [field for field in self.REQUIRED_FIELDS if not cached_data.get(field)]
+        return missing, cached_data.get('image_uploaded', False), cached_data.get('image_verified', False)
 
     @property
     def is_complete(self):
         """Check if all required data is cached"""
-        return len(self.get_missing_fields()) == 0
+        cached_data = self.cached_data
+        return all(cached_data.get(field) for field in self.REQUIRED_FIELDS)
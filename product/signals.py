@@ -0,0 +1,46 @@
+"""
+Django signals for product app cache maintenance.
+
+Keeps the AI assistants' cached service listings, company information and
+recent order lists in sync with the Product, KnowledgeArticle and
+ServiceOrder tables.
+"""
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .cache import (
+    invalidate_company_info_cache,
+    invalidate_recent_orders_cache,
+    invalidate_services_cache,
+)
+from .models import KnowledgeArticle, Product, ServiceOrder
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+def invalidate_company_services_cache(sender, instance, **kwargs):
+    """Drop cached service listings for the product's company."""
+    if not instance.company_id:
+        return
+
+    invalidate_services_cache(instance.company_id)
+
+
+@receiver(post_save, sender=KnowledgeArticle)
+@receiver(post_delete, sender=KnowledgeArticle)
+def invalidate_company_knowledge_cache(sender, instance, **kwargs):
+    """Drop cached company information for the article's company."""
+    if not instance.company_id:
+        return
+
+    invalidate_company_info_cache(instance.company_id)
+
+
+@receiver(post_save, sender=ServiceOrder)
+@receiver(post_delete, sender=ServiceOrder)
+def invalidate_user_recent_orders_cache(sender, instance, **kwargs):
+    """Drop the order creator's cached recent orders once the write commits."""
+    company_id, user_id = instance.company_id, instance.created_by_id
+    transaction.on_commit(lambda: invalidate_recent_orders_cache(company_id, user_id))
@@ -1,3 +1,422 @@
-from django.test import TestCase
-
-# Create your tests here.
+"""
+Tests for the product app: Wazen assistant caching and order lookups.
+"""
+
+import json
+import uuid
+from datetime import timedelta
+from io import StringIO
+from unittest import skipUnless
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.utils import timezone
+
+from company.models import Company
+from product.assistants.wazen_ai_assistant import (
+    _MSG_ORDER_AMBIGUOUS,
+    _MSG_ORDER_NOT_FOUND,
+    WazenAIAssistant,
+)
+from product.cache import company_info_cache_key, recent_orders_cache_key
+from product.management.commands.import_wazen_content import _ARTICLES, _CATEGORIES, _FAQS
+from product.models import (
+    FAQ,
+    KnowledgeArticle,
+    KnowledgeCategory,
+    Product,
+    ServiceOrder,
+    ServiceOrderCache,
+    ServiceOrderStatus,
+)
+
+User = get_user_model()
+
+
+def create_company(name):
+    return Company.objects.create(
+        name=name,
+        activity_name="Business Services",
+        activity_type="SR",
+        subscription_start_date="2024-01-01",
+        subscription_end_date="2024-12-31"
+    )
+
+
+def create_service(company, name="Car Insurance"):
+    return Product.objects.create(
+        name=name,
+        price=100,
+        type='service',
+        company=company,
+        is_service_orderable=True
+    )
+
+
+def create_order(user, service, customer_name="Ahmed Ali", **kwargs):
+    return ServiceOrder.objects.create(
+        company_id=user.company_id,
+        created_by=user,
+        service=service,
+        customer_name=customer_name,
+        customer_age=30,
+        customer_id="1234567890",
+        customer_phone="0512345678",
+        **kwargs
+    )
+
+
+class RecentOrdersCacheTest(TestCase):
+    """Test the cached recent orders list of get_order_status"""
+
+    def setUp(self):
+        cache.clear()
+        self.company = create_company("Wazen")
+        self.user = User.objects.create_user(username="customer", password="pass", company=self.company)
+        self.service = create_service(self.company)
+        self.order = create_order(self.user, self.service)
+        self.assistant = WazenAIAssistant(_user=self.user)
+        self.cache_key = recent_orders_cache_key(self.company.id, self.user.id)
+
+    def test_second_call_served_from_cache(self):
+        """Test the second recent orders call does not query the database"""
+        first = self.assistant.get_order_status()
+
+        with self.assertNumQueries(0):
+            second = self.assistant.get_order_status()
+
+        self.assertEqual(first, second)
+        self.assertEqual(json.loads(second)['count'], 1)
+
+    def test_order_save_invalidates_after_commit(self):
+        """Test saving an order drops the cached list once the write commits"""
+        self.assistant.get_order_status()
+
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            self.order.status = ServiceOrderStatus.APPROVED
+            self.order.save()
+        # Still cached until the transaction commits
+        self.assertIsNotNone(cache.get(self.cache_key))
+
+        for callback in callbacks:
+            callback()
+        self.assertIsNone(cache.get(self.cache_key))
+
+        orders = json.loads(self.assistant.get_order_status())['orders']
+        self.assertEqual(orders[0]['status'], ServiceOrderStatus.APPROVED)
+
+    def test_order_create_invalidates_after_commit(self):
+        """Test a new order appears in the list once its write commits"""
+        self.assistant.get_order_status()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            create_order(self.user, self.service, customer_name="Sara Ali")
+
+        self.assertIsNone(cache.get(self.cache_key))
+        self.assertEqual(json.loads(self.assistant.get_order_status())['count'], 2)
+
+    def test_order_delete_invalidates_after_commit(self):
+        """Test deleting an order drops the cached list once the write commits"""
+        self.assistant.get_order_status()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.order.delete()
+
+        self.assertIsNone(cache.get(self.cache_key))
+        self.assertEqual(json.loads(self.assistant.get_order_status())['count'], 0)
+
+    def test_cached_list_scoped_to_user_and_company(self):
+        """Test orders of other users and companies never reach the cached list"""
+        colleague = User.objects.create_user(username="colleague", password="pass", company=self.company)
+        create_order(colleague, self.service, customer_name="Colleague Order")
+
+        other_company = create_company("Other Company")
+        outsider = User.objects.create_user(username="outsider", password="pass", company=other_company)
+        create_order(outsider, create_service(other_company), customer_name="Outsider Order")
+
+        # A stale entry of another user must not be served either
+        cache.set(recent_orders_cache_key(self.company.id, colleague.id), [{"order_number": "WZ-00000000"}])
+
+        orders = json.loads(self.assistant.get_order_status())['orders']
+
+        self.assertEqual([order['order_number'] for order in orders], [self.order.order_number])
+        self.assertEqual(
+            [order['order_number'] for order in cache.get(self.cache_key)],
+            [self.order.order_number]
+        )
+
+
+class OrderNumberLookupTest(TestCase):
+    """Test looking up a single order by its WZ-XXXXXXXX number"""
+
+    def setUp(self):
+        cache.clear()
+        self.company = create_company("Wazen")
+        self.user = User.objects.create_user(username="customer", password="pass", company=self.company)
+        self.service = create_service(self.company)
+        self.order = create_order(self.user, self.service)
+        self.assistant = WazenAIAssistant(_user=self.user)
+
+    def test_valid_number_finds_order(self):
+        """Test a valid order number returns that order"""
+        response = json.loads(self.assistant.get_order_status(self.order.order_number))
+
+        self.assertEqual(response['status'], 'success')
+        self.assertEqual(response['order']['order_number'], self.order.order_number)
+        self.assertEqual(response['order']['service_name'], self.service.name)
+        self.assertEqual(response['order']['customer_name'], self.order.customer_name)
+
+    def test_lowercase_or_malformed_number_not_found(self):
+        """Test numbers not in the WZ-XXXXXXXX format are not found"""
+        prefix = self.order.id.hex[:8].upper()
+        for order_number in (
+            self.order.order_number.lower(),
+            prefix,
+            f"WZ-{prefix[:7]}",
+            f"WZ-{prefix}0",
+            "WZ-ZZZZZZZZ",
+        ):
+            with self.subTest(order_number=order_number):
+                response = json.loads(self.assistant.get_order_status(order_number))
+                self.assertEqual(response['status'], 'error')
+                self.assertEqual(response['message'], _MSG_ORDER_NOT_FOUND % order_number)
+
+    def test_other_company_order_not_found(self):
+        """Test an order of another company is never returned"""
+        other_company = create_company("Other Company")
+        outsider = User.objects.create_user(username="outsider", password="pass", company=other_company)
+        other_order = create_order(outsider, create_service(other_company))
+
+        response = json.loads(self.assistant.get_order_status(other_order.order_number))
+
+        self.assertEqual(response['status'], 'error')
+        self.assertEqual(response['message'], _MSG_ORDER_NOT_FOUND % other_order.order_number)
+
+    def test_shared_prefix_is_ambiguous(self):
+        """Test a prefix shared by two orders is reported instead of picking one"""
+        first = create_order(self.user, self.service, id=uuid.UUID('abcdef12-0000-4000-8000-000000000001'))
+        create_order(self.user, self.service, id=uuid.UUID('abcdef12-0000-4000-8000-000000000002'))
+
+        response = json.loads(self.assistant.get_order_status(first.order_number))
+
+        self.assertEqual(response['status'], 'error')
+        self.assertEqual(response['message'], _MSG_ORDER_AMBIGUOUS % first.order_number)
+
+
+class UpdateCachedDataTest(TestCase):
+    """Test merging collected customer data into the service order cache row"""
+
+    def setUp(self):
+        self.company = create_company("Wazen")
+        self.user = User.objects.create_user(username="customer", password="pass", company=self.company)
+        self.assistant = WazenAIAssistant(_user=self.user)
+        self.cache_entry = ServiceOrderCache.objects.create(
+            session_key=f"wazen_service_order_{self.user.id}",
+            user=self.user,
+            company=self.company,
+            expires_at=timezone.now() + timedelta(minutes=30),
+            cached_data={'customer_name': 'Ahmed Ali', 'customer_age': 30}
+        )
+        # Backdate the row so a write is visible in updated_at
+        self.old_updated_at = timezone.now() - timedelta(minutes=5)
+        ServiceOrderCache.objects.filter(pk=self.cache_entry.pk).update(updated_at=self.old_updated_at)
+        self.cache_entry.refresh_from_db()
+
+    def test_unchanged_values_skip_the_write(self):
+        """Test values that are already cached issue no query"""
+        with self.assertNumQueries(0):
+            self.assistant._update_cached_data(self.cache_entry, customer_name='Ahmed Ali')
+
+        self.cache_entry.refresh_from_db()
+        self.assertEqual(self.cache_entry.updated_at, self.old_updated_at)
+
+    def test_change_keeps_unrelated_keys(self):
+        """Test a changed value is stored next to the other cached keys"""
+        self.assistant._update_cached_data(self.cache_entry, customer_phone='0512345678')
+
+        expected = {'customer_name': 'Ahmed Ali', 'customer_age': 30, 'customer_phone': '0512345678'}
+        self.assertEqual(self.cache_entry.cached_data, expected)
+        self.cache_entry.refresh_from_db()
+        self.assertEqual(self.cache_entry.cached_data, expected)
+
+    def test_change_bumps_updated_at(self):
+        """Test a write moves updated_at forward in memory and in the database"""
+        self.assistant._update_cached_data(self.cache_entry, customer_age=31)
+        in_memory_updated_at = self.cache_entry.updated_at
+
+        self.cache_entry.refresh_from_db()
+        self.assertGreater(self.cache_entry.updated_at, self.old_updated_at)
+        self.assertEqual(self.cache_entry.updated_at, in_memory_updated_at)
+
+    @skipUnless(connection.vendor == 'postgresql', "jsonb merge is PostgreSQL only")
+    def test_postgresql_merges_only_changed_keys(self):
+        """Test keys written elsewhere since the row was loaded survive the merge"""
+        ServiceOrderCache.objects.filter(pk=self.cache_entry.pk).update(
+            cached_data={'customer_name': 'Ahmed Ali', 'customer_age': 30, 'image_uploaded': True}
+        )
+
+        with self.assertNumQueries(1):
+            self.assistant._update_cached_data(self.cache_entry, customer_id='1234567890')
+
+        self.cache_entry.refresh_from_db()
+        self.assertEqual(self.cache_entry.cached_data, {
+            'customer_name': 'Ahmed Ali',
+            'customer_age': 30,
+            'image_uploaded': True,
+            'customer_id': '1234567890',
+        })
+
+
+class ImportWazenContentTest(TestCase):
+    """Test the import_wazen_content management command"""
+
+    def setUp(self):
+        cache.clear()
+        self.company = create_company("Wazen")
+
+    def import_content(self):
+        out = StringIO()
+        call_command('import_wazen_content', company_id=self.company.id, stdout=out)
+        return out.getvalue()
+
+    def test_first_run_creates_rows(self):
+        """Test the first import creates every category, article and FAQ"""
+        output = self.import_content()
+
+        self.assertEqual(KnowledgeCategory.objects.filter(company=self.company).count(), len(_CATEGORIES))
+        self.assertEqual(KnowledgeArticle.objects.filter(company=self.company).count(), len(_ARTICLES))
+        self.assertEqual(FAQ.objects.filter(company=self.company).count(), len(_FAQS))
+        for cat_data in _CATEGORIES:
+            self.assertIn(f'  Created: {cat_data["name"]}', output)
+        for article_data in _ARTICLES:
+            self.assertIn(f'  Created: {article_data["title"][:50]}...', output)
+        for faq_data in _FAQS:
+            self.assertIn(f'  Created: {faq_data["question"][:50]}...', output)
+        self.assertNotIn('Updated:', output)
+
+    def test_second_run_updates_without_duplicates(self):
+        """Test a second import refreshes existing rows instead of adding new ones"""
+        self.import_content()
+        KnowledgeArticle.objects.filter(company=self.company).update(content_md='old', content='old')
+        FAQ.objects.filter(company=self.company).update(answer_md='old')
+
+        output = self.import_content()
+
+        self.assertEqual(KnowledgeCategory.objects.filter(company=self.company).count(), len(_CATEGORIES))
+        self.assertEqual(KnowledgeArticle.objects.filter(company=self.company).count(), len(_ARTICLES))
+        self.assertEqual(FAQ.objects.filter(company=self.company).count(), len(_FAQS))
+        for article_data in _ARTICLES:
+            article = KnowledgeArticle.objects.get(company=self.company, title=article_data['title'])
+            self.assertEqual(article.content_md, article_data['content_md'])
+            self.assertEqual(article.content, article_data['content_md'])
+            self.assertEqual(article.slug, article_data['slug'])
+        for faq_data in _FAQS:
+            faq = FAQ.objects.get(company=self.company, question=faq_data['question'])
+            self.assertEqual(faq.answer_md, faq_data['answer_md'])
+
+        for cat_data in _CATEGORIES:
+            self.assertIn(f'  Exists: {cat_data["name"]}', output)
+        for article_data in _ARTICLES:
+            self.assertIn(f'  Updated: {article_data["title"][:50]}...', output)
+        for faq_data in _FAQS:
+            self.assertIn(f'  Updated: {faq_data["question"][:50]}...', output)
+        self.assertNotIn('Created:', output)
+
+    def test_company_info_cache_cleared_after_commit(self):
+        """Test the cached company info is dropped once the import commits"""
+        cache_key = company_info_cache_key(self.company.id)
+        cache.set(cache_key, 'cached')
+
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            self.import_content()
+        # Still cached until the transaction commits
+        self.assertEqual(cache.get(cache_key), 'cached')
+
+        for callback in callbacks:
+            callback()
+        self.assertIsNone(cache.get(cache_key))
+
+    def test_slug_taken_by_another_article(self):
+        """Test a new article whose slug is already used gets a numbered slug"""
+        category = KnowledgeCategory.objects.create(company=self.company, name="General")
+        article_data = _ARTICLES[0]
+        other = KnowledgeArticle.objects.create(
+            company=self.company,
+            category=category,
+            title="Another article",
+            slug=article_data['slug'],
+            content="Unrelated content"
+        )
+
+        self.import_content()
+
+        imported = KnowledgeArticle.objects.get(company=self.company, title=article_data['title'])
+        self.assertEqual(imported.slug, f'{article_data["slug"]}-1')
+        other.refresh_from_db()
+        self.assertEqual(other.slug, article_data['slug'])
+        self.assertEqual(other.content, "Unrelated content")
+
+        # Re-running keeps the numbered slug instead of numbering it again
+        self.import_content()
+        imported.refresh_from_db()
+        self.assertEqual(imported.slug, f'{article_data["slug"]}-1')
+
+
+class OrderSessionRowTest(TestCase):
+    """Test the per-user ServiceOrderCache row behind a service order session"""
+
+    def setUp(self):
+        self.company = create_company("Wazen")
+        self.user = User.objects.create_user(username="customer", password="pass", company=self.company)
+        self.service = create_service(self.company)
+        self.assistant = WazenAIAssistant(_user=self.user)
+
+    def test_second_call_reuses_row(self):
+        """Test later calls return the same row instead of adding one"""
+        first = self.assistant._get_or_create_cache()
+        second = WazenAIAssistant(_user=self.user)._get_or_create_cache()
+
+        self.assertEqual(first.pk, second.pk)
+        self.assertEqual(first.session_key, f"wazen_service_order_{self.user.id}")
+        self.assertEqual(ServiceOrderCache.objects.filter(user=self.user).count(), 1)
+
+    def test_expired_row_reset_in_place(self):
+        """Test an expired session starts over in the same row"""
+        cache_entry = self.assistant._get_or_create_cache()
+        ServiceOrderCache.objects.filter(pk=cache_entry.pk).update(
+            service=self.service,
+            cached_data={'customer_name': 'Ahmed Ali'},
+            expires_at=timezone.now() - timedelta(minutes=1)
+        )
+
+        reset_entry = WazenAIAssistant(_user=self.user)._get_or_create_cache()
+
+        self.assertEqual(reset_entry.pk, cache_entry.pk)
+        reset_entry.refresh_from_db()
+        self.assertIsNone(reset_entry.service)
+        self.assertEqual(reset_entry.cached_data, {})
+        self.assertFalse(reset_entry.is_expired)
+        self.assertEqual(ServiceOrderCache.objects.filter(user=self.user).count(), 1)
+
+    def test_legacy_rows_purged_on_first_session(self):
+        """Test rows under the old timestamped keys are deleted for that user only"""
+        other_user = User.objects.create_user(username="other", password="pass", company=self.company)
+        for user, expires_at in (
+            (self.user, timezone.now() - timedelta(days=1)),
+            (self.user, timezone.now() + timedelta(minutes=10)),
+            (other_user, timezone.now() - timedelta(days=1)),
+        ):
+            ServiceOrderCache.objects.create(
+                session_key=f"wazen_service_order_{user.id}_{uuid.uuid4().hex}",
+                user=user,
+                company=self.company,
+                expires_at=expires_at
+            )
+
+        cache_entry = self.assistant._get_or_create_cache()
+
+        self.assertEqual(list(ServiceOrderCache.objects.filter(user=self.user)), [cache_entry])
+        self.assertEqual(ServiceOrderCache.objects.filter(user=other_user).count(), 1)
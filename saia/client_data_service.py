@@ -143,10 +143,7 @@ class ClientDataService:
         with connection.cursor() as cursor:
             cursor.execute(query, params or [])
             columns = [col[0] for col in cursor.description]
-            results = []
-            for row in cursor.fetchall():
-                results.append(dict(zip(columns, row)))
-            return results
+            return [dict(zip(columns, row)) for row in cursor.fetchall()]
 
     def _execute_custom_query(self, connection, query, params):
         """Execute query using custom MySQL connection"""
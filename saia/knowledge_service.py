@@ -7,8 +7,8 @@ It integrates with the existing company-based filtering system and provides inte
 
 import logging
 from typing import List, Dict, Any, Optional
-from django.db.models import Q
-from django.contrib.postgres.search import SearchVector, SearchQuery, SearchRank
+from django.db.models import Count, Q
+from django.db.models.functions import Length, Substr
 from product.models import KnowledgeCategory, KnowledgeArticle, KnowledgeSearchLog
 from saia.utils import sanitize_search_query
 
@@ -22,7 +22,8 @@ class KnowledgeService:
         self.user = user
         self.company = user.company if user and hasattr(user, 'company') else None
     
-    def search_knowledge(self, query: str, limit: int = 10, article_type: str = None) -> List[Dict[str, Any]]:
+    def search_knowledge(self, query: str, limit: int = 10, article_type: str = None,
+                         content_max: int = None) -> List[Dict[str, Any]]:
         """
         Enhanced intelligent search with intent recognition and multi-strategy approach
 
@@ -30,6 +31,7 @@ class KnowledgeService:
             query: Search query string
             limit: Maximum number of results to return
             article_type: Filter by article type (optional)
+            content_max: Truncate content to this many characters in the database (optional)
 
         Returns:
             List of matching articles with relevance ranking
@@ -48,31 +50,94 @@ class KnowledgeService:
         limit = max(1, min(limit, 50))  # Ensure limit is between 1 and 50
 
         # ENHANCED: Multi-strategy intelligent search
-        results = self._intelligent_search(sanitized_query, limit, article_type)
+        results = self._intelligent_search(sanitized_query, limit, article_type, content_max)
 
         # Log the search for analytics
         self._log_search(query, len(results))
 
         return results
 
-    def _intelligent_search(self, query: str, limit: int, article_type: str = None) -> List[Dict[str, Any]]:
+    def search_knowledge_batch(self, queries: List[str], limit: int = 10,
+                               content_max: int = None) -> List[Dict[str, Any]]:
+        """
+        Search several phrasings of the same question in a single pass
+
+        The key terms of all queries are merged and searched together, instead of
+        running the full multi-strategy search once per query. Articles are ranked
+        against the merged terms, so the order can differ from the per-query
+        ranking of search_knowledge. When the merged search finds nothing, every
+        phrasing falls back to the intent, keyword and broad strategies, and
+        their results are combined without duplicates.
+
+        Args:
+            queries: Search query strings
+            limit: Maximum number of results to return
+            content_max: Truncate content to this many characters in the database (optional)
+
+        Returns:
+            List of unique matching articles with relevance ranking
+        """
+        if not self.company:
+            logger.warning(f"Knowledge search attempted without company context for user: {self.user}")
+            return []
+
+        sanitized_queries = []
+        search_terms = []
+        for query in queries:
+            sanitized_query = sanitize_search_query(query)
+            if not sanitized_query:
+                logger.warning(f"Invalid or unsafe query provided: {query}")
+                continue
+            sanitized_queries.append(sanitized_query)
+            for term in self._extract_key_terms(sanitized_query):
+                if term not in search_terms:
+                    search_terms.append(term)
+
+        if not sanitized_queries:
+            return []
+
+        # Validate limit parameter
+        limit = max(1, min(limit, 50))  # Ensure limit is between 1 and 50
+
+        results = []
+        if search_terms:
+            results = self._execute_search_with_terms(search_terms, limit, content_max=content_max)
+        if not results:
+            seen_ids = set()
+            for sanitized_query in sanitized_queries:
+                for result in self._intelligent_search(sanitized_query, limit, None, content_max):
+                    if result['id'] not in seen_ids:
+                        seen_ids.add(result['id'])
+                        results.append(result)
+                if len(results) >= limit:
+                    break
+            results = results[:limit]
+
+        # Log the search for analytics
+        self._log_search(' | '.join(queries)[:500], len(results))
+
+        return results
+
+    def _intelligent_search(self, query: str, limit: int, article_type: str = None,
+                            content_max: int = None) -> List[Dict[str, Any]]:
         """
         Multi-strategy intelligent search with intent recognition
         """
         # Strategy 1: Intent-based search
-        intent_results = self._search_by_intent(query, limit, article_type)
+        intent_results = self._search_by_intent(query, limit, article_type, content_max)
         if intent_results:
             return intent_results
 
         # Strategy 2: Enhanced keyword search
-        keyword_results = self._search_by_keywords(query, limit, article_type)
+        keyword_results = self._search_by_keywords(query, limit, article_type, content_max)
         if keyword_results:
             return keyword_results
 
         # Strategy 3: Fallback broad search
-        return self._search_fallback(query, limit, article_type)
+        return self._search_fallback(query, limit, article_type, content_max)
         
-    def _search_by_intent(self, query: str, limit: int, article_type: str = None) -> List[Dict[str, Any]]:
+    def _search_by_intent(self, query: str, limit: int, article_type: str = None,
+                          content_max: int = None) -> List[Dict[str, Any]]:
         """
         Search based on user intent recognition
         """
@@ -121,9 +186,10 @@ class KnowledgeService:
             return []
 
         # Search using extracted terms
-        return self._execute_search_with_terms(search_terms, limit, article_type)
+        return self._execute_search_with_terms(search_terms, limit, article_type, content_max)
 
-    def _search_by_keywords(self, query: str, limit: int, article_type: str = None) -> List[Dict[str, Any]]:
+    def _search_by_keywords(self, query: str, limit: int, article_type: str = None,
+                            content_max: int = None) -> List[Dict[str, Any]]:
         """
         Enhanced keyword-based search with Arabic support
         """
@@ -133,7 +199,7 @@ class KnowledgeService:
         if not key_terms:
             return []
 
-        return self._execute_search_with_terms(key_terms, limit, article_type)
+        return self._execute_search_with_terms(key_terms, limit, article_type, content_max)
 
     def _extract_key_terms(self, query: str) -> List[str]:
         """
@@ -153,13 +219,12 @@ class KnowledgeService:
 
         return key_terms
     
-    def _execute_search_with_terms(self, search_terms: List[str], limit: int, article_type: str = None) -> List[Dict[str, Any]]:
+    def _execute_search_with_terms(self, search_terms: List[str], limit: int, article_type: str = None,
+                                   content_max: int = None) -> List[Dict[str, Any]]:
         """
         Execute search using multiple terms with intelligent ranking
         """
         try:
-            from django.db.models import Q
-
             # Build base queryset
             queryset = KnowledgeArticle.objects.filter(
                 company=self.company,
@@ -169,6 +234,8 @@ class KnowledgeService:
             if article_type:
                 queryset = queryset.filter(article_type=article_type)
 
+            queryset = self._with_content_excerpt(queryset, content_max)
+
             # Strategy 1: Exact title matches (highest priority)
             exact_matches = []
             for term in search_terms:
@@ -211,13 +278,14 @@ class KnowledgeService:
             # Limit results
             final_results = prioritized_results[:limit]
 
-            return self._format_results(final_results)
+            return self._format_results(final_results, content_max)
 
         except Exception as e:
             logger.error(f"Search execution failed: {e}")
             return []
 
-    def _search_fallback(self, query: str, limit: int, article_type: str = None) -> List[Dict[str, Any]]:
+    def _search_fallback(self, query: str, limit: int, article_type: str = None,
+                         content_max: int = None) -> List[Dict[str, Any]]:
         """
         Fallback broad search when specific searches fail
         """
@@ -231,8 +299,9 @@ class KnowledgeService:
             if article_type:
                 queryset = queryset.filter(article_type=article_type)
 
+            queryset = self._with_content_excerpt(queryset, content_max)
+
             # Broad search across all text fields
-            from django.db.models import Q
             broad_search = (
                 Q(title__icontains=query) |
                 Q(content__icontains=query) |
@@ -242,22 +311,40 @@ class KnowledgeService:
 
             results = queryset.filter(broad_search)[:limit]
 
-            return self._format_results(results)
+            return self._format_results(results, content_max)
 
         except Exception as e:
             logger.error(f"Fallback search failed: {e}")
             return []
 
-    def _format_results(self, results) -> List[Dict[str, Any]]:
+    def _with_content_excerpt(self, queryset, content_max: int = None):
+        """
+        Select only the first content_max characters of article content,
+        so long articles are truncated by the database instead of in Python
+        """
+        if not content_max:
+            return queryset
+        return queryset.defer('content').annotate(
+            content_excerpt=Substr('content', 1, content_max),
+            content_length=Length('content'),
+        )
+
+    def _format_results(self, results, content_max: int = None) -> List[Dict[str, Any]]:
         """
         Format search results into standardized dictionary format
         """
         articles = []
         for article in results:
+            if content_max:
+                content = article.content_excerpt
+                if article.content_length > content_max:
+                    content += '...'
+            else:
+                content = article.content
             articles.append({
                 'id': article.id,
                 'title': article.title,
-                'content': article.content,
+                'content': content,
                 'article_type': article.article_type,
                 'category': article.category.name,
                 'keywords': article.get_keywords_list(),
@@ -447,7 +534,7 @@ class KnowledgeService:
             
             # Most common queries
             common_queries = logs.values('query').annotate(
-                count=models.Count('query')
+                count=Count('query')
             ).order_by('-count')[:10]
             
             return {
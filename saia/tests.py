@@ -0,0 +1,73 @@
+"""
+Tests for the SAIA knowledge service search.
+"""
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+
+from company.models import Company
+from product.models import KnowledgeArticle, KnowledgeCategory
+from saia.knowledge_service import KnowledgeService
+
+User = get_user_model()
+
+
+class KnowledgeSearchBatchTest(TestCase):
+    """Test searching several phrasings of one question in a single pass"""
+
+    def setUp(self):
+        self.company = Company.objects.create(
+            name="Wazen",
+            activity_name="Business Services",
+            activity_type="SR",
+            subscription_start_date="2024-01-01",
+            subscription_end_date="2024-12-31"
+        )
+        self.user = User.objects.create_user(username="customer", password="pass", company=self.company)
+        self.service = KnowledgeService(user=self.user)
+
+    def create_article(self, category_name, title, content):
+        category, _ = KnowledgeCategory.objects.get_or_create(company=self.company, name=category_name)
+        return KnowledgeArticle.objects.create(
+            company=self.company,
+            category=category,
+            title=title,
+            content=content
+        )
+
+    def test_batch_hit_ranks_like_single_query(self):
+        """Test phrasings sharing key terms rank like the single-query search"""
+        self.create_article("General", "About us", "Our pricing is simple and clear")
+        self.create_article("General", "Pricing plans", "Monthly and yearly plans")
+        self.create_article("General", "Contact", "Call us any time")
+
+        single = self.service.search_knowledge("pricing")
+        batch = self.service.search_knowledge_batch(["pricing", "what is pricing"])
+
+        self.assertEqual(
+            [result['title'] for result in batch],
+            [result['title'] for result in single]
+        )
+        # Title matches rank ahead of content matches
+        self.assertEqual([result['title'] for result in batch], ["Pricing plans", "About us"])
+
+    def test_empty_merged_search_falls_back_per_phrasing(self):
+        """Test each phrasing falls back on its own and duplicates are dropped"""
+        invoices = self.create_article("Billing", "Invoices", "Monthly statements")
+        returns = self.create_article("Refunds", "Returns policy", "Send items back within 14 days")
+
+        # Neither term appears in titles, content or keywords, only in category names
+        self.assertEqual(self.service._execute_search_with_terms(["billing", "refunds"], 10), [])
+
+        results = self.service.search_knowledge_batch(["billing", "refunds", "Billing"])
+
+        self.assertEqual([result['id'] for result in results], [invoices.id, returns.id])
+
+    def test_fallback_respects_limit(self):
+        """Test the combined fallback results are cut to the limit"""
+        self.create_article("Billing", "Invoices", "Monthly statements")
+        self.create_article("Refunds", "Returns policy", "Send items back within 14 days")
+
+        results = self.service.search_knowledge_batch(["billing", "refunds"], limit=1)
+
+        self.assertEqual([result['title'] for result in results], ["Invoices"])